@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark des lecteurs et exports sur des catalogues synthetiques.
+
+Genere des classeurs Materials / EdgeBands de 100, 1k, 10k et 50k lignes
+avec la structure reelle (lignes 1 a 4 : entete XML, tags, headers) de
+Liste_panneaux_et_chants.xlsm, puis mesure pour chaque lecteur
+(read_all_materials_from_xlsm, read_materials_from_xlsm,
+read_edgebands_from_xlsm) et chaque export, avec le lecteur XLSX direct
+(avec le balayage rapide pour les cas *_fast_scan, avec openpyxl pour
+les cas *_openpyxl) :
+  - le temps d'execution (meilleur de --repeat) ;
+  - le pic de memoire (RSS) du processus.
+
+Chaque mesure tourne dans un interpreteur neuf (pic RSS propre a la mesure,
+cache disque des classeurs desactive). Les resultats sont ecrits en JSON et
+compares a une reference enregistree (--save-baseline) : un cas plus lent
+que la reference de plus de --tolerance est signale comme regression.
+
+Usage :
+    python benchmarks/bench_catalogue.py [--sizes 100,1000] [--cases export_all]
+        [--repeat 3] [--json out.json] [--baseline ref.json] [--save-baseline]
+
+Code de sortie 1 si une regression est detectee.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_DIR, "benchmarks")
+MODULE = "export_optiplanning"
+SOURCE_XLSM = os.path.join(REPO_DIR, "Liste_panneaux_et_chants.xlsm")
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, "data")
+DEFAULT_JSON = os.path.join(BENCH_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "results", "baseline.json")
+
+# A incrementer si le contenu des classeurs generes change
+FIXTURE_VERSION = 1
+
+# Cas mesures : nom -> (fonction du module, passe un dossier de sortie[, lecteur])
+# Lecteur des pages : "direct" (XlsxReader avec iterparse, defaut),
+# "fast_scan" (XlsxReader avec balayage rapide) ou "openpyxl"
+CASES = {
+    "read_all_materials": ("read_all_materials_from_xlsm", False),
+    "read_all_materials_fast_scan": ("read_all_materials_from_xlsm", False, "fast_scan"),
+    "read_all_materials_openpyxl": ("read_all_materials_from_xlsm", False, "openpyxl"),
+    "read_materials": ("read_materials_from_xlsm", False),
+    "read_edgebands": ("read_edgebands_from_xlsm", False),
+    "export_txt": ("export_optiplanning_txt", True),
+    "export_nesting": ("export_xml_boards_nesting", True),
+    "export_materials": ("export_xml_materials", True),
+    "export_edgebands": ("export_xml_edgebands", True),
+    "export_all": ("export_all", True),
+    "export_all_openpyxl": ("export_all", True, "openpyxl"),
+}
+
+# Variantes des lignes synthetiques (cycliques)
+_FAMILIES = (
+    ("Melamine-F186-Beton Chicago gris clair-ST9", "Melamine 19 mm"),
+    ("Melamine-H1180-Chene Halifax naturel-ST37", "Melamine 19 mm"),
+    ("Agglo brut", "Agglo"),
+    ("MDF hydrofuge", "MDF"),
+    ("Stratifie-U999-Noir", "Stratifie"),
+)
+_THICKNESSES = (8, 16, 19, 22, 38)
+_BOARDS = ((2800, 2070), (3050, 1300), (4100, 2070), (5600, 2070))
+_SUPPLIERS = ("Dispano", "Panofrance", "Bouney")
+
+
+# ---------------------------------------------------------------------------
+# Generation des classeurs synthetiques
+# ---------------------------------------------------------------------------
+
+def _read_layout(path):
+    """Lignes 1 a 4 et lignes de donnees reelles de chaque page du XLSM source."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path)
+    layout = {}
+    for name in ("Materials", "EdgeBands"):
+        ws = wb[name]
+        rows = [list(r) for r in ws.iter_rows(min_row=1, max_row=ws.max_row,
+                                              max_col=ws.max_column, values_only=True)]
+        layout[name] = (rows[:4], [r for r in rows[4:] if r and r[0]])
+    return layout
+
+
+def _material_row(base, i):
+    """Ligne Materials n i (ligne Excel i + 5) derivee de la ligne reelle."""
+    from openpyxl.formula.translate import Translator
+
+    row = list(base)
+    family, path = _FAMILIES[i % len(_FAMILIES)]
+    board_l, board_w = _BOARDS[i % len(_BOARDS)]
+    excel_row = i + 5
+    row[0] = f"{family}-{i:06d}"
+    row[1] = 7000000 + i
+    row[2] = path
+    row[3] = _THICKNESSES[i % len(_THICKNESSES)]
+    row[4] = i % 2
+    # Un cout vide sur 50 : chemin "cout par defaut" des exports
+    row[5] = None if i % 50 == 0 else round(5 + (i * 37 % 2000) / 100, 2)
+    if isinstance(base[12], str) and base[12].startswith("="):
+        row[12] = Translator(base[12], origin="M5").translate_formula(f"M{excel_row}")
+    row[43] = board_l
+    row[44] = board_w
+    # Une reference fournisseur vide sur 40
+    row[45] = None if i % 40 == 0 else 7000000 + i
+    row[46] = _SUPPLIERS[i % len(_SUPPLIERS)]
+    return row
+
+
+def _edgeband_row(bases, i):
+    row = list(bases[i % len(bases)])
+    row[0] = f"Chant {i:06d} - {row[0]}"
+    row[1] = i + 1
+    row[4] = round(0.5 + (i % 30) / 10, 2)
+    row[6] = (10, 23, 33, 43)[i % 4]
+    return row
+
+
+def generate_workbook(path, rows, layout):
+    """Ecrit un classeur de `rows` materiaux et rows // 4 chants (mode write_only)."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    mat_header, mat_data = layout["Materials"]
+    eb_header, eb_data = layout["EdgeBands"]
+
+    ws = wb.create_sheet("Materials")
+    for values in mat_header:
+        ws.append(values)
+    for i in range(rows):
+        ws.append(_material_row(mat_data[0], i))
+
+    ws = wb.create_sheet("EdgeBands")
+    for values in eb_header:
+        ws.append(values)
+    for i in range(max(3, rows // 4)):
+        ws.append(_edgeband_row(eb_data, i))
+
+    tmp_path = path + ".tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def ensure_workbooks(sizes, data_dir):
+    """Chemins des classeurs synthetiques, generes s'ils n'existent pas encore."""
+    os.makedirs(data_dir, exist_ok=True)
+    layout = None
+    paths = {}
+    for rows in sizes:
+        path = os.path.join(data_dir, f"catalogue_{rows}_v{FIXTURE_VERSION}.xlsm")
+        if not os.path.exists(path):
+            if layout is None:
+                layout = _read_layout(SOURCE_XLSM)
+            print(f"Generation de {os.path.basename(path)} ...", flush=True)
+            start = time.perf_counter()
+            generate_workbook(path, rows, layout)
+            print(f"  {time.perf_counter() - start:.1f} s", flush=True)
+        paths[rows] = path
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Mesure (processus enfant)
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mb():
+    """Pic de memoire du processus courant en Mo (None si non mesurable)."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case, xlsm_path):
+    """Execute un cas dans ce processus et affiche {"seconds", "peak_rss_mb"} en JSON."""
+    sys.path.insert(0, REPO_DIR)
+    module = __import__(MODULE)
+    module.configure_cache(enabled=False)
+    func_name, with_output, *reader = CASES[case]
+    if reader == ["openpyxl"]:
+        module.configure_reader(direct=False)
+    elif reader == ["fast_scan"]:
+        module.configure_reader(fast_scan=True)
+    func = getattr(module, func_name)
+    quiet = lambda msg: None
+    with tempfile.TemporaryDirectory() as output_dir:
+        kwargs = {"log_func": quiet}
+        if with_output:
+            kwargs["output_dir"] = output_dir
+        start = time.perf_counter()
+        result = func(xlsm_path, **kwargs)
+        seconds = time.perf_counter() - start
+    if not result:
+        raise RuntimeError(f"{case} : resultat vide pour {xlsm_path}")
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": _peak_rss_mb()}))
+
+
+def measure(case, xlsm_path, repeat):
+    """Meilleur temps et pic RSS maximal sur `repeat` processus neufs."""
+    best, peak = None, None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-case", case,
+                               xlsm_path], cwd=REPO_DIR, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Echec de {case} :\n{proc.stderr}")
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        best = sample["seconds"] if best is None else min(best, sample["seconds"])
+        if sample["peak_rss_mb"] is not None:
+            peak = max(peak or 0.0, sample["peak_rss_mb"])
+    return best, peak
+
+
+# ---------------------------------------------------------------------------
+# Comparaison a la reference
+# ---------------------------------------------------------------------------
+
+def compare(results, baseline, tolerance, min_delta=0.05):
+    """Liste des regressions : (cas, lignes, secondes, secondes reference).
+
+    Les ecarts de moins de min_delta secondes sont ignores (bruit de mesure
+    sur les petits catalogues).
+    """
+    reference = {(r["case"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        ref = reference.get((r["case"], r["rows"]))
+        if ref is None:
+            continue
+        r["baseline_seconds"] = ref["seconds"]
+        r["ratio"] = round(r["seconds"] / ref["seconds"], 3) if ref["seconds"] else None
+        if (r["seconds"] > ref["seconds"] * (1 + tolerance)
+                and r["seconds"] - ref["seconds"] > min_delta):
+            regressions.append((r["case"], r["rows"], r["seconds"], ref["seconds"]))
+    return regressions
+
+
+def _print_table(results):
+    print(f"{'cas':<28} {'lignes':>7} {'temps (s)':>10} {'pic RSS (Mo)':>13} {'vs ref':>8}")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        ratio = f"x{r['ratio']:.2f}" if r.get("ratio") else "-"
+        print(f"{r['case']:<28} {r['rows']:>7} {r['seconds']:>10.3f} {rss:>13} {ratio:>8}")
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="nombres de lignes Materials, separes par des virgules")
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help=f"cas mesures, separes par des virgules ({', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="mesures par cas (le meilleur temps est garde)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="dossier des classeurs synthetiques (reutilises d'un run a l'autre)")
+    parser.add_argument("--json", default=DEFAULT_JSON, help="fichier JSON des resultats")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="fichier JSON de reference")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="enregistre ces resultats comme nouvelle reference")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="ralentissement tolere avant regression (0.20 = +20%%)")
+    parser.add_argument("--run-case", nargs=2, metavar=("CAS", "XLSM"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        run_case(*args.run_case)
+        return 0
+
+    sizes = [int(n) for n in args.sizes.split(",") if n.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"cas inconnu(s) : {', '.join(unknown)}")
+
+    workbooks = ensure_workbooks(sizes, args.data_dir)
+    results = []
+    for rows in sizes:
+        for case in cases:
+            seconds, peak = measure(case, workbooks[rows], args.repeat)
+            results.append({"case": case, "rows": rows, "seconds": round(seconds, 4),
+                            "peak_rss_mb": round(peak, 1) if peak is not None else None})
+            print(f"  {case:<20} {rows:>7} lignes : {seconds:.3f} s", flush=True)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    data = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "fixture_version": FIXTURE_VERSION,
+        },
+        "results": results,
+    }
+    _write_json(args.json, data)
+    if args.save_baseline:
+        _write_json(args.baseline, data)
+        print(f"Reference enregistree : {args.baseline}")
+
+    print()
+    _print_table(results)
+    if regressions:
+        print()
+        for case, rows, seconds, ref in regressions:
+            print(f"REGRESSION : {case} ({rows} lignes) {seconds:.3f} s "
+                  f"contre {ref:.3f} s en reference")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
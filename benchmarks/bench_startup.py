@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de demarrage du mode CLI (style `python -X importtime`).
+
+Importe export_optiplanning dans un interpreteur neuf avec -X importtime,
+puis verifie que :
+  - les modules GUI / pretty-print (tkinter, xml.dom.minidom) ne sont pas
+    charges au demarrage (PIL n'est pas controle : openpyxl l'importe
+    lui-meme quand Pillow est installe) ;
+  - le temps d'import cumule du module reste sous le seuil (--max-ms,
+    300 ms par defaut : environ 1,5 fois l'import median mesure, openpyxl
+    compris ; une regression qui charge un module lourd le depasse).
+
+Usage :
+    python benchmarks/bench_startup.py [--runs 5] [--max-ms 300] [--json out.json]
+
+Code de sortie 1 si un module interdit est charge ou si le seuil est depasse.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE = "export_optiplanning"
+
+# Modules qui ne doivent pas etre importes par le mode CLI
+FORBIDDEN_MODULES = ("tkinter", "xml.dom.minidom")
+
+
+def measure_import(python=sys.executable):
+    """Importe le module avec -X importtime.
+
+    Retourne (temps cumule du module en ms, modules presents dans sys.modules).
+    """
+    code = f"import sys, {MODULE}; print('\\n'.join(sys.modules))"
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import de {MODULE} impossible :\n{proc.stderr}")
+
+    # Lignes : "import time:   self [us] |  cumulative | imported package"
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() == MODULE:
+            total_ms = int(cumulative_us) / 1000.0
+    return total_ms, set(proc.stdout.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="nombre d'imports mesures")
+    parser.add_argument("--max-ms", type=float, default=300.0,
+                        help="seuil du temps d'import median (ms)")
+    parser.add_argument("--json", help="ecrit le resultat en JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    timings = []
+    loaded = set()
+    for _ in range(args.runs):
+        total_ms, modules = measure_import()
+        timings.append(total_ms)
+        loaded.update(name for name in modules
+                      if any(name == m or name.startswith(m + ".") for m in FORBIDDEN_MODULES))
+
+    median_ms = statistics.median(timings)
+    result = {
+        "module": MODULE,
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "threshold_ms": args.max_ms,
+        "forbidden_loaded": sorted(loaded),
+    }
+    print(f"Import {MODULE} : median {median_ms:.1f} ms "
+          f"(min {min(timings):.1f}, max {max(timings):.1f}, {args.runs} runs)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    ok = True
+    if loaded:
+        print(f"ECHEC : modules GUI charges au demarrage : {', '.join(sorted(loaded))}")
+        ok = False
+    if median_ms > args.max_ms:
+        print(f"ECHEC : temps d'import {median_ms:.1f} ms > seuil {args.max_ms:.0f} ms")
+        ok = False
+    if ok:
+        print("OK")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Non-regression des exports : comparaison octet par octet avec des fichiers de reference.
+
+Chaque export (TXT, Nesting, Materiaux, Chants, et les 4 fichiers de
+export_all) est lance sur les classeurs de benchmarks/golden/fixtures/ et
+compare aux fichiers de benchmarks/golden/expected/ : CRLF, tabulations,
+ordre des attributs, balises auto-fermantes... tout ecart est signale.
+Seuls sont normalises le nom horodate des fichiers (les sorties sont
+rangees par type d'export) et les UUID aleatoires (uuid4) ; les
+LibraryUUID deterministes (uuid5) sont compares tels quels. Chaque sortie
+XML doit aussi etre bien formee (valeurs echappees).
+
+Les lecteurs de pages sont aussi compares entre eux : balayage rapide,
+iterparse et openpyxl doivent lire les memes lignes, sur chaque classeur de
+fixtures/ et sur des copies dont le XML des pages est ecrit autrement (prefixe
+d'espace de noms, ordre des attributs, retours a la ligne).
+
+Le plan de colonnes des exports Materiaux / Chants est enfin rendu sur une
+grille de lignes ecrite ici (GRID_ROWS), sans classeur ni openpyxl, et
+compare a GRID_EXPECTED.
+
+Un nouveau moteur d'export peut ainsi etre branche et prouve equivalent :
+    python benchmarks/golden.py            # complet (+ catalogue synthetique 2000 lignes)
+    python benchmarks/golden.py --fast     # petits classeurs seulement, < 1 s (pre-commit)
+    python benchmarks/golden.py --update   # apres un changement VOLONTAIRE de format
+
+Le catalogue synthetique (mode complet) est genere par bench_catalogue.py ;
+seules les empreintes SHA-256 de ses exports sont stockees.
+
+Code de sortie 1 si un export differe de sa reference.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_DIR, "benchmarks")
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+FIXTURES_DIR = os.path.join(GOLDEN_DIR, "fixtures")
+EXPECTED_DIR = os.path.join(GOLDEN_DIR, "expected")
+MODULE = "export_optiplanning"
+
+SYNTHETIC_ROWS = 2000
+
+_UUID4_RE = re.compile(rb"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}")
+_UUID4_PLACEHOLDER = b"00000000-0000-4000-8000-000000000000"
+
+# Lecteurs de pages compares : options de configure_reader
+READERS = {
+    "balayage": {"direct": True, "fast_scan": True},
+    "iterparse": {"direct": True, "fast_scan": False},
+    "openpyxl": {"direct": False},
+}
+_MAIN_NS = b"http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_UNPREFIXED_TAG_RE = re.compile(rb"<(/?)(?=[A-Za-z_])(?![\w.-]+:)")
+_CELL_ATTRS_RE = re.compile(rb'<c r="([A-Z]+\d+)" s="(\d+)" t="(\w+)"')
+_ROW7_FIRST_CELL_RE = re.compile(rb'(<row r="7"[^>]*>)<c r=')
+
+# Page Materials minimale (lignes 1 a 4 puis donnees) : attributs, Properties,
+# Property sans Properties, Layers successifs, ligne sans Name, valeurs a
+# echapper et formule simple
+GRID_ROWS = [
+    (None,) * 9,
+    (None,) * 9,
+    ("", "", "Properties", "Property", "/Properties", "Layers", "/Layer", "Layer", "/Layers"),
+    ("Name", "Thickness", "BOARDL", "BOARDW", "COST", "Name", "Thickness", "Name", "Thickness"),
+    ("MEL_BLANC", 19, 2800, 2070, 1.5, "Chant", 0.8, "Face", 0.5),
+    ("A&B <x>", None, None, 2070, None, None, None, None, None),
+    (None, 19, 2800, None, None, None, None, None, None),
+    ("SEUL", 16, None, None, None, None, None, None, None),
+    ("COPIE", "=B5", None, None, None, "Chant", None, None, None),
+]
+GRID_EXPECTED = (
+    '\t<Materials>'
+    '\n\t\t<Material Name="MEL_BLANC" Thickness="19">'
+    '\n\t\t\t<Properties>'
+    '\n\t\t\t\t<Property Name="BOARDL" Value="2800" />'
+    '\n\t\t\t\t<Property Name="BOARDW" Value="2070" />'
+    '\n\t\t\t\t<Property Name="COST" Value="1.5" />'
+    '\n\t\t\t</Properties>'
+    '\n\t\t\t<Layers>'
+    '\n\t\t\t\t<Layer Name="Chant" Thickness="0.8" />'
+    '\n\t\t\t\t<Layer Name="Face" Thickness="0.5" />'
+    '\n\t\t\t</Layers>'
+    '\n\t\t</Material>'
+    '\n\t\t<Material Name="A&amp;B &lt;x>">'
+    '\n\t\t\t<Properties>'
+    '\n\t\t\t\t<Property Name="BOARDW" Value="2070" />'
+    '\n\t\t\t</Properties>'
+    '\n\t\t</Material>'
+    '\n\t\t<Material Name="SEUL" Thickness="16" />'
+    '\n\t\t<Material Name="COPIE" Thickness="19">'
+    '\n\t\t\t<Layers>'
+    '\n\t\t\t\t<Layer Name="Chant" />'
+    '\n\t\t\t</Layers>'
+    '\n\t\t</Material>'
+    '\n\t</Materials>'
+)
+
+
+def normalize(data: bytes) -> bytes:
+    """Remplace les UUID aleatoires (version 4) par une valeur fixe."""
+    return _UUID4_RE.sub(_UUID4_PLACEHOLDER, data)
+
+
+def _import_module():
+    sys.path.insert(0, REPO_DIR)
+    module = __import__(MODULE)
+    # Le cache disque ne doit pas masquer la lecture du classeur
+    module.configure_cache(enabled=False)
+    return module
+
+
+def run_exports(module, xlsm_path: str) -> dict:
+    """Lance tous les exports du classeur ; retourne {nom de sortie: octets normalises}."""
+    quiet = lambda msg: None
+    outputs = {}
+    work_dir = tempfile.mkdtemp(prefix="golden_")
+    try:
+        single = {
+            "txt.txt": module.export_optiplanning_txt,
+            "nesting.xml": module.export_xml_boards_nesting,
+            "materials.xml": module.export_xml_materials,
+            "edgebands.xml": module.export_xml_edgebands,
+        }
+        for name, export_func in single.items():
+            out_dir = tempfile.mkdtemp(dir=work_dir)
+            path = export_func(xlsm_path, output_dir=out_dir, log_func=quiet)
+            if not path:
+                raise RuntimeError(f"{name} : aucun fichier genere pour {xlsm_path}")
+            with open(path, "rb") as f:
+                outputs[name] = normalize(f.read())
+
+        out_dir = tempfile.mkdtemp(dir=work_dir)
+        manifest = module.export_all(xlsm_path, output_dir=out_dir, log_func=quiet)
+        for kind, info in manifest["outputs"].items():
+            ext = os.path.splitext(info["path"])[1]
+            with open(info["path"], "rb") as f:
+                outputs[f"all_{kind}{ext}"] = normalize(f.read())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return outputs
+
+
+def read_sheets(module, xlsm_path: str, reader: str) -> dict:
+    """{(page, data_only): lignes} du classeur lues avec un lecteur de READERS."""
+    module.configure_reader(**READERS[reader])
+    sheets = {}
+    try:
+        for name in module.SNAPSHOT_SHEETS:
+            for data_only in (False, True):
+                try:
+                    sheets[name, data_only] = list(
+                        module.iter_sheet_rows(xlsm_path, name, data_only=data_only))
+                except KeyError:
+                    pass
+    finally:
+        module.configure_reader()
+    return sheets
+
+
+def _rewrite_sheets(xlsm_path: str, out_path: str, rewrite):
+    """Copie du classeur dont le XML de chaque page passe par rewrite(octets)."""
+    with zipfile.ZipFile(xlsm_path) as src, \
+            zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info.filename)
+            if info.filename.startswith("xl/worksheets/") and info.filename.endswith(".xml"):
+                data = rewrite(data)
+            dst.writestr(info, data)
+
+
+def _prefixed(data: bytes) -> bytes:
+    """Espace de noms principal declare avec un prefixe (<x:row>...)."""
+    data = data.replace(b'xmlns="' + _MAIN_NS + b'"', b'xmlns:x="' + _MAIN_NS + b'"')
+    return _UNPREFIXED_TAG_RE.sub(rb"<\1x:", data)
+
+
+def _reordered(data: bytes) -> bytes:
+    """Attributs t avant s, une cellule par ligne, ligne 7 de forme inattendue."""
+    data = _CELL_ATTRS_RE.sub(rb'<c r="\1" t="\3" s="\2"', data)
+    data = _ROW7_FIRST_CELL_RE.sub(rb"\1<c  r=", data)
+    return data.replace(b"<c r=", b"\n    <c r=")
+
+
+def check_readers(module, fixture: str, xlsm_path: str) -> list:
+    """Lignes lues differemment selon le lecteur ou la forme du XML des pages."""
+    expected = read_sheets(module, xlsm_path, "openpyxl")
+    failures = []
+    work_dir = tempfile.mkdtemp(prefix="golden_")
+    try:
+        paths = {"": xlsm_path}
+        for label, rewrite in (("prefixe", _prefixed), ("attributs", _reordered)):
+            paths[label] = os.path.join(work_dir, f"{label}.xlsm")
+            _rewrite_sheets(xlsm_path, paths[label], rewrite)
+        for label, path in paths.items():
+            for reader in READERS:
+                if read_sheets(module, path, reader) != expected:
+                    variant = f" (XML {label})" if label else ""
+                    failures.append(f"{fixture} : lecteur {reader}{variant} different "
+                                    f"d'openpyxl")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return failures
+
+
+def check_grid(module) -> list:
+    """Rendu du plan de colonnes sur GRID_ROWS (SheetData construite a la main)."""
+    sheet = module.SheetData("Materials", max_row=len(GRID_ROWS), max_column=len(GRID_ROWS[2]),
+                             tags=list(GRID_ROWS[2]), headers=list(GRID_ROWS[3]),
+                             rows=list(GRID_ROWS))
+    out = io.StringIO()
+    module._write_vba_xml_block(out, sheet)
+    actual = out.getvalue()
+    if actual == GRID_EXPECTED:
+        return []
+    return [f"grille : {describe_difference(GRID_EXPECTED.encode(), actual.encode())}"]
+
+
+def describe_difference(expected: bytes, actual: bytes) -> str:
+    """Position et lignes du premier ecart entre deux sorties."""
+    limit = min(len(expected), len(actual))
+    offset = next((i for i in range(limit) if expected[i] != actual[i]), limit)
+    line_no = expected.count(b"\n", 0, offset) + 1
+    start = expected.rfind(b"\n", 0, offset) + 1
+
+    def line_at(data):
+        end = data.find(b"\n", start)
+        return data[start:end if end != -1 else len(data)][:200]
+
+    return (f"octet {offset}, ligne {line_no} "
+            f"(tailles {len(expected)} / {len(actual)})\n"
+            f"      attendu : {line_at(expected)!r}\n"
+            f"      obtenu  : {line_at(actual)!r}")
+
+
+def check_files(fixture: str, outputs: dict, update: bool) -> list:
+    """Compare (ou enregistre) les sorties completes d'un classeur."""
+    expected_dir = os.path.join(EXPECTED_DIR, fixture)
+    failures = []
+    if update:
+        shutil.rmtree(expected_dir, ignore_errors=True)
+        os.makedirs(expected_dir)
+    for name, data in sorted(outputs.items()):
+        path = os.path.join(expected_dir, name)
+        if update:
+            with open(path, "wb") as f:
+                f.write(data)
+            continue
+        try:
+            with open(path, "rb") as f:
+                expected = f.read()
+        except OSError:
+            failures.append(f"{fixture}/{name} : reference absente (lancer --update)")
+            continue
+        if expected != data:
+            failures.append(f"{fixture}/{name} : {describe_difference(expected, data)}")
+    return failures
+
+
+def check_well_formed(fixture: str, outputs: dict) -> list:
+    """Sorties XML non analysables (caractere non echappe, balise mal fermee...)."""
+    failures = []
+    for name, data in sorted(outputs.items()):
+        if not name.endswith(".xml"):
+            continue
+        try:
+            ET.fromstring(data)
+        except ET.ParseError as e:
+            failures.append(f"{fixture}/{name} : XML mal forme ({e})")
+    return failures
+
+
+def check_digests(fixture: str, outputs: dict, update: bool) -> list:
+    """Compare (ou enregistre) les empreintes SHA-256 des sorties d'un classeur."""
+    path = os.path.join(EXPECTED_DIR, f"{fixture}.json")
+    digests = {name: hashlib.sha256(data).hexdigest() for name, data in outputs.items()}
+    if update:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(digests, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    except OSError:
+        return [f"{fixture} : reference absente (lancer --update)"]
+    return [f"{fixture}/{name} : empreinte differente de la reference"
+            for name in sorted(set(expected) | set(digests))
+            if expected.get(name) != digests.get(name)]
+
+
+def _synthetic_workbook(data_dir: str) -> str:
+    sys.path.insert(0, BENCH_DIR)
+    import bench_catalogue
+    return bench_catalogue.ensure_workbooks([SYNTHETIC_ROWS], data_dir)[SYNTHETIC_ROWS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fast", action="store_true",
+                        help="petits classeurs seulement (pre-commit)")
+    parser.add_argument("--update", action="store_true",
+                        help="regenere les references a partir des exports actuels")
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "data"),
+                        help="dossier du catalogue synthetique (mode complet)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    module = _import_module()
+    fixtures = sorted(f for f in os.listdir(FIXTURES_DIR) if f.endswith(".xlsm"))
+    failures = []
+    checked = 0
+    for filename in fixtures:
+        outputs = run_exports(module, os.path.join(FIXTURES_DIR, filename))
+        fixture = os.path.splitext(filename)[0]
+        failures += check_well_formed(fixture, outputs)
+        failures += check_files(fixture, outputs, args.update)
+        failures += check_readers(module, fixture, os.path.join(FIXTURES_DIR, filename))
+        checked += len(outputs)
+    failures += check_grid(module)
+    checked += 1
+    if not args.fast:
+        outputs = run_exports(module, _synthetic_workbook(args.data_dir))
+        failures += check_well_formed(f"synthetique_{SYNTHETIC_ROWS}", outputs)
+        failures += check_digests(f"synthetique_{SYNTHETIC_ROWS}", outputs, args.update)
+        checked += len(outputs)
+
+    elapsed = time.perf_counter() - start
+    if args.update:
+        print(f"References mises a jour : {checked} fichiers ({elapsed:.2f} s)")
+        return 0
+    for failure in failures:
+        print(f"DIFFERENCE {failure}")
+    if failures:
+        print(f"ECHEC : {len(failures)} export(s) sur {checked} different(s) ({elapsed:.2f} s)")
+        return 1
+    print(f"OK : {checked} exports identiques aux references ({elapsed:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
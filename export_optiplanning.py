@@ -8,23 +8,34 @@ Genere les fichiers d'export depuis Outil_Material_Import.xlsm :
   4. XML Chants (edgebands pour SWOOD)
 """
 
+import functools
+import hashlib
+import json
 import os
+import pickle
+import queue
+import re
 import sys
+import tempfile
+import threading
+import time
 import uuid
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional, List
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from PIL import Image, ImageTk
+
+# Tkinter, PIL et minidom sont importes a la demande (App, _pretty_xml) :
+# le mode CLI demarre plus vite et fonctionne sans affichage.
+tk = filedialog = messagebox = ttk = None
 
 # On embarque tout le code directement (pas d'import externe sauf openpyxl)
 try:
     import openpyxl
 except ImportError:
     if getattr(sys, 'frozen', False):
+        from tkinter import messagebox
         messagebox.showerror("Erreur", "Module openpyxl manquant.\nInstaller : pip install openpyxl")
     else:
         print("ERREUR: pip install openpyxl")
@@ -43,11 +54,230 @@ SWOOD_XSI = "http://www.w3.org/2001/XMLSchema-instance"
 SWOOD_VERSION = "2"
 
 
+class ExportCancelled(Exception):
+    """Levee par un progress_func pour interrompre proprement un export entre deux lignes."""
+
+
+# ---------------------------------------------------------------------------
+# Mesures des exports : temps par phase, compteurs, profilage
+# ---------------------------------------------------------------------------
+
+# Phases mesurees et libelle du journal
+PHASES = {
+    "load": "lecture",        # classeur (openpyxl ou cache) et conversion des lignes
+    "resolve": "formules",    # resolution des formules simples
+    "validate": "validation", # controle des lignes avant export
+    "build": "generation",    # construction du texte TXT / XML
+    "write": "ecriture",      # ecriture disque
+}
+PROFILE_TOP = 15
+
+
+class ExportMetrics:
+    """Temps par phase et compteurs collectes pendant un export (voir measure_export).
+
+    Les temps sont exclusifs : une phase ouverte dans une autre (ex. write
+    pendant build) est deduite de la phase englobante. Avec export_all, les
+    threads d'ecriture cumulent leurs temps : la somme des phases peut
+    depasser la duree totale.
+    """
+
+    def __init__(self, profiling: bool = False):
+        self.profiling = profiling
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.counters = {}
+        self.seconds = 0.0
+        self.memory_peak = None
+        self.profile_top = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Chronometre le bloc dans la phase `name` (phase englobante suspendue)."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        now = time.perf_counter()
+        if stack:
+            self._add_time(stack[-1][0], now - stack[-1][1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._add_time(name, now - stack.pop()[1])
+            if stack:
+                stack[-1][1] = now
+
+    def charge(self, name: str, seconds: float):
+        """Impute une duree mesuree a part (ex. un write) et la retire de la phase ouverte."""
+        self._add_time(name, seconds)
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            stack[-1][1] += seconds
+
+    def _add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @property
+    def write_rate(self) -> float:
+        """Debit d'ecriture des sorties (octets/s sur la phase write, 0 sans ecriture)."""
+        seconds = self.phases.get("write", 0.0)
+        return self.counters.get("bytes_written", 0) / seconds if seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """Resume serialisable en JSON."""
+        result = {"seconds": round(self.seconds, 4),
+                  "phases": {name: round(s, 4) for name, s in self.phases.items()},
+                  "counters": dict(self.counters),
+                  "write_bytes_per_s": round(self.write_rate)}
+        if self.memory_peak is not None:
+            result["memory_peak_bytes"] = self.memory_peak
+        if self.profile_top:
+            result["profile"] = self.profile_top
+        return result
+
+    def log_summary(self, log_func=print):
+        phases = " | ".join(f"{PHASES.get(name, name)} {s:.2f} s"
+                            for name, s in self.phases.items())
+        c = self.counters
+        log_func(f"Mesures : {self.seconds:.2f} s au total ({phases})")
+        log_func(f"  {c.get('rows_read', 0)} lignes lues ({c.get('cells_read', 0)} cellules), "
+                 f"{c.get('formulas_resolved', 0)} formules resolues, "
+                 f"{c.get('rows_written', 0)} lignes ecrites "
+                 f"({c.get('bytes_written', 0) / 1e6:.2f} Mo, "
+                 f"{self.write_rate / 1e6:.1f} Mo/s)")
+        if c.get("cache_hits"):
+            log_func(f"  {c['cache_hits']} lecture(s) depuis le cache disque")
+        normalised = c.get("normalise_hits", 0) + c.get("normalise_misses", 0)
+        if normalised:
+            log_func(f"  {normalised} valeurs normalisees, "
+                     f"{100 * c.get('normalise_hits', 0) / normalised:.0f} % depuis le cache")
+        if self.memory_peak is not None:
+            log_func(f"  Pic memoire Python (tracemalloc) : {self.memory_peak / 1e6:.1f} Mo")
+        for entry in self.profile_top[:5]:
+            log_func(f"  {entry['cumulative']:8.3f} s  {entry['calls']:>8}  {entry['function']}")
+
+
+# Mesures de l'export en cours (None : pas de mesure, cout nul)
+_metrics: Optional[ExportMetrics] = None
+
+
+@contextmanager
+def _timed(phase: str):
+    """Chronometre le bloc dans une phase si des mesures sont actives."""
+    metrics = _metrics
+    if metrics is None:
+        yield
+    else:
+        with metrics.phase(phase):
+            yield
+
+
+def _count(name: str, n: int = 1):
+    """Incremente un compteur si des mesures sont actives."""
+    if _metrics is not None:
+        _metrics.add(name, n)
+
+
+def _record_output(output_path: str):
+    """Compte la taille d'un fichier genere dans bytes_written."""
+    if _metrics is not None:
+        try:
+            _metrics.add("bytes_written", os.path.getsize(output_path))
+        except OSError:
+            pass
+
+
+class _MeasuredFile:
+    """Fichier de sortie dont chaque write() est impute a la phase write."""
+    __slots__ = ("_file", "_metrics")
+
+    def __init__(self, f, metrics: ExportMetrics):
+        self._file = f
+        self._metrics = metrics
+
+    def write(self, text: str) -> int:
+        start = time.perf_counter()
+        n = self._file.write(text)
+        self._metrics.charge("write", time.perf_counter() - start)
+        return n
+
+    def writelines(self, lines):
+        start = time.perf_counter()
+        self._file.writelines(lines)
+        self._metrics.charge("write", time.perf_counter() - start)
+
+
+def _profile_top(profiler, limit: int = PROFILE_TOP) -> List[dict]:
+    """Fonctions les plus couteuses (temps cumule) d'un cProfile.Profile."""
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{"function": f"{os.path.basename(filename)}:{line}({func})",
+             "calls": nc, "own": round(tt, 4), "cumulative": round(ct, 4)}
+            for (filename, line, func), (cc, nc, tt, ct, callers) in top]
+
+
+@contextmanager
+def measure_export(log_func=print, profile: bool = False, profile_path: Optional[str] = None):
+    """Active les mesures pendant le bloc et retourne l'ExportMetrics collecte.
+
+    Le resume est journalise a la sortie du bloc (pas en cas d'exception).
+    profile=True ajoute cProfile (fonctions les plus couteuses, fichier
+    pstats ecrit dans profile_path si donne) et tracemalloc (pic memoire) ;
+    l'export est alors nettement plus lent.
+    """
+    global _metrics
+    previous = _metrics
+    metrics = _metrics = ExportMetrics(profiling=profile)
+    normalised = _normaliser_calls()
+    profiler = None
+    tracing = False
+    if profile:
+        import cProfile
+        import tracemalloc
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            if tracing:
+                metrics.memory_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            metrics.profile_top = _profile_top(profiler)
+            if profile_path:
+                profiler.dump_stats(profile_path)
+        metrics.seconds = time.perf_counter() - metrics._started
+        hits, misses = _normaliser_calls()
+        metrics.add("normalise_hits", hits - normalised[0])
+        metrics.add("normalise_misses", misses - normalised[1])
+        _metrics = previous
+    metrics.log_summary(log_func)
+    if profile_path:
+        log_func(f"  Profil cProfile : {profile_path}")
+
+
 # ---------------------------------------------------------------------------
 # Dataclasses
 # ---------------------------------------------------------------------------
 
-@dataclass
+# __slots__ (Python 3.10+) : pas de __dict__ par instance, un objet par ligne
+# du catalogue coute nettement moins de memoire
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class MaterialSWOOD:
     """Un materiau SWOOD lu depuis le XLSM (page Materials)."""
     name: str = ""
@@ -103,7 +333,7 @@ class MaterialSWOOD:
     parametres: str = ""
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class EdgeBandSWOOD:
     """Un chant SWOOD lu depuis le XLSM (page EdgeBands)."""
     name: str = ""
@@ -131,10 +361,123 @@ class EdgeBandSWOOD:
     eb_supplier: str = ""
 
 
+# Champs de MaterialSWOOD dans l'ordre des colonnes de la page Materials
+# (les 49 premiers), suivis du champ calcule parametres
+MATERIAL_FIELDS = tuple(f.name for f in fields(MaterialSWOOD))
+
+
+class MaterialTable:
+    """Materiaux en colonnes : une liste par champ de MaterialSWOOD, indexee par ligne.
+
+    Construite directement depuis les tuples de lignes du XLSM (from_rows),
+    sans creer d'objet par ligne. Les exports la parcourent avec
+    iter_columns() ; row() / to_list() ne materialisent des MaterialSWOOD
+    que si un appelant en a besoin.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Optional[dict] = None):
+        self.columns = {name: [] for name in MATERIAL_FIELDS}
+        if columns:
+            self.columns.update(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["name"])
+
+    def column(self, name: str) -> list:
+        return self.columns[name]
+
+    def iter_columns(self, *names):
+        """Tuples (une valeur par champ demande) ligne par ligne."""
+        return zip(*(self.columns[name] for name in names))
+
+    def row(self, index: int) -> MaterialSWOOD:
+        return MaterialSWOOD(*(self.columns[name][index] for name in MATERIAL_FIELDS))
+
+    def to_list(self) -> List[MaterialSWOOD]:
+        return [MaterialSWOOD(*values) for values in self.iter_columns(*MATERIAL_FIELDS)]
+
+    @classmethod
+    def from_materials(cls, materials) -> "MaterialTable":
+        materials = list(materials)
+        return cls({name: [getattr(m, name) for m in materials] for name in MATERIAL_FIELDS})
+
+    @classmethod
+    def from_rows(cls, rows) -> "MaterialTable":
+        """Table depuis les lignes de la page Materials (tuples d'au moins 49 valeurs).
+
+        Memes regles que read_all_materials_from_xlsm : lignes sans Name
+        ignorees, valeurs passees par _safe_str colonne par colonne,
+        parametres et SawReference par defaut calcules.
+        """
+        kept = [values for values in rows if values[0] and str(values[0]).strip() != ""]
+        columns = {"name": [str(values[0]).strip() for values in kept]}
+        for j, name in enumerate(MATERIAL_FIELDS[1:49], start=1):
+            columns[name] = [_safe_str(values[j]) for values in kept]
+        columns["parametres"] = parametres_column(columns["board_l"])
+        columns["saw_reference"] = [
+            saw_ref or compute_saw_reference(name, thickness)
+            for saw_ref, name, thickness in zip(columns["saw_reference"], columns["name"],
+                                                columns["thickness"])
+        ]
+        return cls(columns)
+
+
+def iter_material_columns(materials, *names):
+    """Valeurs des champs demandes ligne par ligne, pour une liste de MaterialSWOOD
+    ou une MaterialTable (sans creer d'objet par ligne dans ce second cas)."""
+    if isinstance(materials, MaterialTable):
+        return materials.iter_columns(*names)
+    return (tuple(getattr(m, name) for name in names) for m in materials)
+
+
+def material_column(materials, name: str) -> list:
+    """Toutes les valeurs d'un champ (liste de MaterialSWOOD ou MaterialTable)."""
+    if isinstance(materials, MaterialTable):
+        return materials.column(name)
+    return [getattr(m, name) for m in materials]
+
+
 # ---------------------------------------------------------------------------
 # Fonctions de calcul
 # ---------------------------------------------------------------------------
 
+# Taille des caches des normaliseurs (valeurs distinctes gardees par fonction)
+NORMALISE_CACHE_SIZE = 65536
+
+_normalisers = []
+
+
+def _normaliser(func):
+    """Cache LRU borne d'un normaliseur de cellule, cle (type, valeur).
+
+    Les colonnes d'un catalogue (epaisseurs, chemins, fournisseurs,
+    booleens...) se repetent : une valeur deja vue est rendue sans calcul,
+    et toujours par le meme objet str. Le type fait partie de la cle
+    (True, 1 et 1.0 sont egaux mais ne se formatent pas pareil).
+    """
+    cached = functools.lru_cache(maxsize=NORMALISE_CACHE_SIZE, typed=True)(func)
+    _normalisers.append(cached)
+    return cached
+
+
+def normaliser_cache_stats() -> dict:
+    """{normaliseur: {"hits", "misses", "size"}} depuis le demarrage du processus."""
+    stats = {}
+    for cached in _normalisers:
+        info = cached.cache_info()
+        stats[cached.__name__] = {"hits": info.hits, "misses": info.misses,
+                                  "size": info.currsize}
+    return stats
+
+
+def _normaliser_calls() -> tuple:
+    """(hits, misses) cumules de tous les normaliseurs."""
+    infos = [cached.cache_info() for cached in _normalisers]
+    return sum(i.hits for i in infos), sum(i.misses for i in infos)
+
+
 def compute_saw_reference(name: str, thickness) -> str:
     """Calcule le SawReference par defaut : identique au Name.
     (Anciennement ajoutait ' XX mm' pour les melamine, ce qui creait
@@ -145,13 +488,18 @@ def compute_saw_reference(name: str, thickness) -> str:
     return name
 
 
+# Longueur de plaque (mm) au-dela de laquelle le parametre est "Destribois 5m"
+PARAMETRES_5M_MIN_LENGTH = 3200
+
+
 def compute_parametres(board_l) -> str:
     try:
-        return "Destribois 5m" if float(board_l) > 3200 else "Destribois"
+        return "Destribois 5m" if float(board_l) > PARAMETRES_5M_MIN_LENGTH else "Destribois"
     except (TypeError, ValueError):
         return "Destribois"
 
 
+@_normaliser
 def format_cost(cost) -> str:
     if cost is None or str(cost).strip() == "":
         return "1.50"
@@ -161,6 +509,7 @@ def format_cost(cost) -> str:
         return "1.50"
 
 
+@_normaliser
 def _safe_str(value) -> str:
     if value is None:
         return ""
@@ -175,6 +524,7 @@ def _safe_str(value) -> str:
     return s
 
 
+@_normaliser
 def _bool_str(value) -> str:
     """Convertit une valeur en 'true'/'false' pour XML SWOOD."""
     if value is None:
@@ -185,6 +535,35 @@ def _bool_str(value) -> str:
     return "false"
 
 
+# Caracteres interdits dans une valeur d'attribut XML entre guillemets
+_XML_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", '"': "&quot;"})
+
+
+@_normaliser
+def _xml_attr(value: str) -> str:
+    """Valeur d'attribut XML : &, < et " echappes (Panneaux &amp; Co).
+
+    Une chaine sans ces caracteres (cas courant) est rendue telle quelle,
+    sans copie ; le cache du normaliseur evite meme ce test pour une valeur
+    deja vue.
+    """
+    if "&" in value or "<" in value or '"' in value:
+        return value.translate(_XML_ATTR_ESCAPES)
+    return value
+
+
+def _xml_attr_column(values: list) -> list:
+    """_xml_attr sur toute une colonne de textes.
+
+    Une seule recherche sur la colonne jointe : une colonne propre est
+    rendue telle quelle, sans aucun appel par valeur.
+    """
+    text = "".join(values)
+    if "&" in text or "<" in text or '"' in text:
+        return list(map(_xml_attr, values))
+    return values
+
+
 def _grain_direction(name: str) -> str:
     """Determine la direction du grain a partir du nom du materiau."""
     n = name.lower()
@@ -196,122 +575,1268 @@ def _grain_direction(name: str) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Lecture XLSM - Page Materials (complete, 49 colonnes)
+# Calculs par colonne : dimensions, couts, parametres, compteurs (NumPy optionnel)
 # ---------------------------------------------------------------------------
+# Chaque texte distinct d'une colonne est converti une seule fois ; les
+# calculs derives sont ensuite faits sur la colonne entiere, en Python pur
+# par defaut ou par NumPy sur demande (tableaux float64 : memes arrondis
+# IEEE que Python, resultats identiques au bit pres). La conversion du
+# texte reste en Python et les exports reformatent des float Python : sur
+# un catalogue de 50k lignes, NumPy n'est pas plus rapide (aller-retour
+# liste -> tableau -> liste), d'ou le defaut.
+
+# Calcul par lot avec NumPy s'il est installe (voir configure_numeric)
+_use_numpy = False
+_numpy_module = None
+_numpy_checked = False
+
+
+def configure_numeric(use_numpy: bool = True):
+    """Calculs par colonne avec NumPy (s'il est installe) ou en Python pur (defaut)."""
+    global _use_numpy
+    _use_numpy = use_numpy
+
+
+def _numpy():
+    """Module numpy (importe a la premiere utilisation), None si absent ou desactive."""
+    global _numpy_module, _numpy_checked
+    if not _use_numpy:
+        return None
+    if not _numpy_checked:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return _numpy_module
 
-def _resolve_cell(ws, row, col):
-    """Lit une cellule et resout les formules simples (=XX123)."""
-    import re as _re
-    val = ws.cell(row=row, column=col).value
-    if isinstance(val, str) and val.startswith("="):
-        m = _re.match(r"^=([A-Z]{1,3})(\d+)$", val)
-        if m:
-            ref_col_str = m.group(1)
-            ref_row = int(m.group(2))
-            ref_col = 0
-            for ch in ref_col_str:
-                ref_col = ref_col * 26 + (ord(ch) - ord('A') + 1)
-            ref_val = ws.cell(row=ref_row, column=ref_col).value
-            if isinstance(ref_val, str) and ref_val.startswith("="):
-                return val
-            return ref_val
-    return val
-
-
-def read_all_materials_from_xlsm(xlsm_path: str, log_func=print) -> List[MaterialSWOOD]:
-    """Lit TOUTES les colonnes de la page Materials (49 colonnes)."""
-    log_func(f"Lecture de : {os.path.basename(xlsm_path)} (Materials - complet)")
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=False)
-    ws = wb["Materials"]
-    materials = []
-    for row in range(5, ws.max_row + 1):
-        name = _resolve_cell(ws, row, 1)
-        if not name or str(name).strip() == "":
+
+def _float_column(values, default: float) -> List[float]:
+    """Conversion d'une colonne texte en nombres, une seule fois par valeur distincte.
+
+    Valeur vide ou non numerique : default.
+    """
+    parsed = {}
+    result = []
+    add = result.append
+    for value in values:
+        number = parsed.get(value)
+        if number is None:
+            try:
+                number = float(value) if value else default
+            except (ValueError, TypeError):
+                number = default
+            parsed[value] = number
+        add(number)
+    return result
+
+
+def board_dimensions(materials, settings: Optional["NestingSettings"] = None) -> tuple:
+    """(longueurs, largeurs, epaisseurs en m, couts par plaque) des plaques Nesting.
+
+    Dimensions vides ou non numeriques : valeurs par defaut de settings
+    (NESTING_SETTINGS si None) ; cout = longueur x largeur x prix/m2 (0 si
+    le prix est vide). Listes de float Python, une valeur par materiau.
+    """
+    settings = settings or NESTING_SETTINGS
+    lengths = _float_column(material_column(materials, "board_l"), settings.length_mm)
+    widths = _float_column(material_column(materials, "board_w"), settings.width_mm)
+    thicknesses = _float_column(material_column(materials, "thickness"), settings.thickness_mm)
+    costs_m2 = _float_column(material_column(materials, "cost"), 0.0)
+    np = _numpy()
+    if np is not None:
+        lengths = np.array(lengths, dtype=np.float64) / 1000.0
+        widths = np.array(widths, dtype=np.float64) / 1000.0
+        costs = lengths * widths * np.array(costs_m2, dtype=np.float64)
+        thicknesses = np.array(thicknesses, dtype=np.float64) / 1000.0
+        return lengths.tolist(), widths.tolist(), thicknesses.tolist(), costs.tolist()
+    lengths = [length / 1000.0 for length in lengths]
+    widths = [width / 1000.0 for width in widths]
+    costs = [length * width * cost_m2
+             for length, width, cost_m2 in zip(lengths, widths, costs_m2)]
+    return lengths, widths, [thick / 1000.0 for thick in thicknesses], costs
+
+
+def parametres_column(board_lengths) -> List[str]:
+    """compute_parametres sur toute une colonne board_l (texte, mm)."""
+    lengths = _float_column(board_lengths, float("nan"))  # nan : toujours "Destribois"
+    np = _numpy()
+    if np is not None:
+        long_boards = np.array(lengths, dtype=np.float64) > PARAMETRES_5M_MIN_LENGTH
+        return np.where(long_boards, "Destribois 5m", "Destribois").tolist()
+    return ["Destribois 5m" if length > PARAMETRES_5M_MIN_LENGTH else "Destribois"
+            for length in lengths]
+
+
+def material_counts(materials) -> dict:
+    """Compteurs des resumes d'export, une passe (en C) par colonne.
+
+    {"5m": plaques "Destribois 5m", "default_cost": cout par defaut 1.50,
+     "no_ref": sans ref fournisseur, "grain": grain horizontal (FiberMaterial 1)}
+    """
+    refs = material_column(materials, "ref_fournisseur")
+    return {
+        "5m": material_column(materials, "parametres").count("Destribois 5m"),
+        "default_cost": material_column(materials, "cost").count("1.50"),
+        "no_ref": len(refs) - sum(map(bool, refs)),
+        "grain": material_column(materials, "fiber_material").count("1"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Lecture XLSM - Snapshot (chargement unique du classeur)
+# ---------------------------------------------------------------------------
+
+DEFAULT_XML_LINE1 = '<?xml version="1.0" encoding="utf-8"?>'
+SNAPSHOT_SHEETS = ("Materials", "EdgeBands")
+
+
+@dataclass
+class SheetData:
+    """Contenu brut d'une page du XLSM, lu une seule fois.
+
+    rows[i] contient les valeurs de la ligne Excel i + 1 (tuple de
+    max_column valeurs). Les tags (row 3) et headers (row 4) sont
+    deja nettoyes comme le fait la macro VBA.
+    """
+    name: str
+    max_row: int = 0
+    max_column: int = 0
+    xml_line1: str = DEFAULT_XML_LINE1
+    xml_line2: str = ""
+    tags: List[str] = field(default_factory=list)
+    headers: List[str] = field(default_factory=list)
+    rows: List[tuple] = field(default_factory=list)
+    # Grille avec formules simples resolues (calculee une fois, voir resolved_rows)
+    resolved: Optional[List[tuple]] = None
+    formulas_resolved: int = 0
+    formula_cycles: List[str] = field(default_factory=list)
+
+    def value(self, row: int, col: int):
+        """Valeur brute de la cellule (base 1), None si hors de la grille."""
+        if 1 <= row <= len(self.rows):
+            values = self.rows[row - 1]
+            if 1 <= col <= len(values):
+                return values[col - 1]
+        return None
+
+    def resolved_rows(self) -> List[tuple]:
+        """Grille dont les formules simples (=XX123) sont remplacees par leur valeur."""
+        if self.resolved is None:
+            with _timed("resolve"):
+                self.resolved = _resolve_formula_grid(self)
+        return self.resolved
+
+    def data_rows(self, width: int = 0, resolved: bool = False):
+        """Itere (numero_ligne, valeurs) sur les lignes de donnees (row 5+).
+
+        Les tuples plus courts que `width` sont completes par des None.
+        resolved=True lit la grille aux formules simples resolues.
+        """
+        grid = self.resolved_rows() if resolved else self.rows
+        for row in range(5, self.max_row + 1):
+            values = grid[row - 1]
+            if len(values) < width:
+                values = values + (None,) * (width - len(values))
+            yield row, values
+
+
+def iter_sheet_rows(xlsm_path: str, sheet_name: str, data_only: bool = False,
+                    min_row: int = 1, progress_func=None):
+    """Lit une page en flux (XlsxReader ou openpyxl read_only=True) en tuples.
+
+    Ni le modele objet des cellules ni le projet VBA ne sont charges : la
+    memoire ne depend plus de la taille du classeur. Les tuples ont une
+    longueur variable (colonnes vides en fin de ligne omises) et les lignes
+    absentes du XML sont rendues comme des tuples vides.
+    Leve KeyError immediatement si la page n'existe pas.
+    progress_func(lignes_lues, total_estime) est appele a chaque ligne.
+    Le lecteur direct (XlsxReader) est utilise s'il est actif et que le
+    fichier est lisible par lui, sinon openpyxl.
+    """
+    reader = _open_direct_reader(xlsm_path)
+    if reader is not None:
+        if sheet_name not in reader.members:
+            reader.close()
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        total = max(reader.max_row(sheet_name) - min_row + 1, 0)
+        row_iter = reader.iter_rows(sheet_name, data_only, min_row)
+        close = reader.close
+    else:
+        wb = openpyxl.load_workbook(xlsm_path, read_only=True, data_only=data_only)
+        if sheet_name not in wb.sheetnames:
+            wb.close()
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        ws = wb[sheet_name]
+        total = max((ws.max_row or 0) - min_row + 1, 0)
+        # La dimension declaree dans le XML peut etre fausse : on lit tout
+        ws.reset_dimensions()
+        row_iter = ws.iter_rows(min_row=min_row, values_only=True)
+        close = wb.close
+
+    def _rows():
+        done = cells = 0
+        try:
+            for done, values in enumerate(row_iter, 1):
+                if progress_func is not None:
+                    progress_func(done, total)
+                cells += len(values)
+                yield tuple(values)
+        finally:
+            close()
+            _count("rows_read", done)
+            _count("cells_read", cells)
+    return _rows()
+
+
+def _iter_data_rows(rows, width: int = 0):
+    """Itere (numero_ligne, valeurs) depuis un flux de lignes commencant en row 5."""
+    for row, values in enumerate(rows, start=5):
+        if len(values) < width:
+            values = values + (None,) * (width - len(values))
+        yield row, values
+
+
+def _collect_rows(row_iter, total: int, progress_func=None) -> List[tuple]:
+    """Liste des lignes lues ; progress_func(lignes_lues, total_estime) a chaque ligne."""
+    if progress_func is None:
+        return list(row_iter)
+    rows = []
+    for values in row_iter:
+        rows.append(values)
+        progress_func(len(rows), total)
+    return rows
+
+
+def _sheet_data_from_rows(name: str, rows: List[tuple]) -> SheetData:
+    """Construit un SheetData a partir des lignes (row 1+) d'une page."""
+    max_row = len(rows)
+    max_col = max((len(values) for values in rows), default=0)
+    if _metrics is not None:
+        _metrics.add("rows_read", max_row)
+        _metrics.add("cells_read", sum(len(values) for values in rows))
+    rows = [values if len(values) == max_col else values + (None,) * (max_col - len(values))
+            for values in rows]
+    sheet = SheetData(name=name, max_row=max_row, max_column=max_col, rows=rows)
+    sheet.xml_line1 = str(sheet.value(1, 1) or DEFAULT_XML_LINE1)
+    sheet.xml_line2 = str(sheet.value(2, 1) or "")
+    for j in range(1, max_col + 1):
+        tag = sheet.value(3, j)
+        sheet.tags.append(str(tag).strip() if tag else "")
+        header = sheet.value(4, j)
+        sheet.headers.append(str(header).strip() if header else "")
+    return sheet
+
+
+class WorkbookSnapshot:
+    """Classeur XLSM charge une seule fois (entete A1/A2, tags, headers, donnees).
+
+    Un snapshot peut etre passe a tous les lecteurs `read_*_from_xlsm` et a
+    toutes les fonctions `export_*` : chaque export ne parse alors le fichier
+    qu'une seule fois.
+    data_only=True lit les valeurs calculees par Excel, False lit les formules
+    (references simples resolues ensuite par SheetData.resolved_rows).
+    read_only=True (defaut) lit les pages en flux, avec XlsxReader (ou
+    openpyxl read_only si configure_reader(direct=False) ou fichier non
+    lisible directement) ; False charge le classeur complet avec keep_vba
+    comme auparavant.
+    progress_func(lignes_lues, total_estime) est appele a chaque ligne lue.
+    """
+
+    def __init__(self, xlsm_path: str, data_only: bool = False,
+                 sheet_names=SNAPSHOT_SHEETS, read_only: bool = True,
+                 progress_func=None):
+        with _timed("load"):
+            self._load(xlsm_path, data_only, sheet_names, read_only, progress_func)
+
+    def _load(self, xlsm_path, data_only, sheet_names, read_only, progress_func):
+        self.xlsm_path = xlsm_path
+        self.data_only = data_only
+        self.sheets = {}
+        reader = _open_direct_reader(xlsm_path) if read_only else None
+        if reader is not None:
+            with reader:
+                for name in sheet_names:
+                    if name in reader.members:
+                        rows = _collect_rows(reader.iter_rows(name, data_only),
+                                             reader.max_row(name), progress_func)
+                        self.sheets[name] = _sheet_data_from_rows(name, rows)
+            return
+        if read_only:
+            wb = openpyxl.load_workbook(xlsm_path, read_only=True, data_only=data_only)
+        else:
+            wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=data_only)
+        try:
+            for name in sheet_names:
+                if name not in wb.sheetnames:
+                    continue
+                ws = wb[name]
+                total = ws.max_row or 0
+                if read_only:
+                    ws.reset_dimensions()
+                    row_iter = ws.iter_rows(min_row=1, values_only=True)
+                else:
+                    row_iter = ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1,
+                                            max_col=ws.max_column, values_only=True)
+                rows = _collect_rows((tuple(values) for values in row_iter), total,
+                                     progress_func)
+                self.sheets[name] = _sheet_data_from_rows(name, rows)
+        finally:
+            wb.close()
+
+    @classmethod
+    def from_rows(cls, xlsm_path: str, data_only: bool, sheet_rows: dict) -> "WorkbookSnapshot":
+        """Reconstruit un snapshot depuis {page: lignes} (cache disque, sans openpyxl)."""
+        snapshot = cls.__new__(cls)
+        snapshot.xlsm_path = xlsm_path
+        snapshot.data_only = data_only
+        snapshot.sheets = {name: _sheet_data_from_rows(name, rows)
+                           for name, rows in sheet_rows.items()}
+        return snapshot
+
+    def has_sheet(self, name: str) -> bool:
+        return name in self.sheets
+
+    def sheet(self, name: str) -> SheetData:
+        """Retourne la page demandee (KeyError si absente du XLSM)."""
+        try:
+            return self.sheets[name]
+        except KeyError:
+            raise KeyError(f"Worksheet {name} does not exist.") from None
+
+
+# ---------------------------------------------------------------------------
+# Lecture XLSX directe : zip + analyse du XML des pages, sans openpyxl
+# ---------------------------------------------------------------------------
+
+_XLSX_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_ROW_TAG = _XLSX_MAIN_NS + "row"
+_CELL_TAG = _XLSX_MAIN_NS + "c"
+_VALUE_TAG = _XLSX_MAIN_NS + "v"
+_FORMULA_TAG = _XLSX_MAIN_NS + "f"
+_INLINE_TAG = _XLSX_MAIN_NS + "is"
+_TEXT_TAG = _XLSX_MAIN_NS + "t"
+_RUN_TAG = _XLSX_MAIN_NS + "r"
+_SI_TAG = _XLSX_MAIN_NS + "si"
+
+# Les pages sont lues avec iterparse (XlsxReader._parse_rows), qui accepte
+# tout XML valide. Sur demande (configure_reader(fast_scan=True), CLI
+# --fast-scan), le balayage rapide (XlsxReader._scan_rows) decoupe plutot
+# le texte des pages ecrites par Excel / openpyxl : 2 a 3x plus rapide
+# qu'iterparse, dont l'analyse expat de chaque balise domine la lecture
+# (benchmarks/bench_catalogue.py : read_all_materials, 10k lignes, 0.70 s
+# contre 1.48 s avec iterparse seul et 4.0 s avec openpyxl). Ses
+# limites sont voulues, tout le reste passe par ElementTree :
+#  - racine <worksheet> avec l'espace de noms par defaut, sans prefixe ;
+#    sinon toute la page est lue avec iterparse ;
+#  - lignes "<row ...>" ne contenant que des cellules '<c r="...' ; une
+#    ligne d'une autre forme : la suite de la page est lue avec iterparse ;
+#  - cellules <c r s t> dans cet ordre, avec au plus une formule simple
+#    <f>, une valeur <v> ou une chaine <is><t> ; toute autre cellule
+#    (formule partagee, chaine riche, autre ordre d'attributs, date) est
+#    analysee seule par ElementTree, comme dans iterparse.
+_XLSX_ROOT_RE = re.compile(r"<worksheet\b([^>]*)>")
+_XLSX_NS_DECL_RE = re.compile(r'\sxmlns(?::\w+)?="[^"]*"')
+_XLSX_DIMENSION_RE = re.compile(r'<dimension ref="[A-Z]*(\d*)(?::[A-Z]*(\d+))?"')
+_XLSX_ROW_NUMBER_RE = re.compile(r'\sr="([^"]*)"')
+# Suite d'une cellule apres '<c r="A1"' : style, type, formule simple, valeur, chaine
+_XLSX_CELL_TAIL_RE = re.compile(
+    r'(?: s="(\d+)")?(?: t="(\w+)")?\s*'
+    r'(?:/>|>(?:<f>([^<]*)</f>)?(?:<v>([^<]*)</v>|<v\s*/>)?'
+    r'(?:<is><t(?: xml:space="preserve")?>([^<]*)</t></is>)?</c>)\s*')
+_XML_ENTITY_RE = re.compile(r"&(?:#(\d+)|#x([0-9a-fA-F]+)|(lt|gt|amp|quot|apos));")
+_XML_ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+_SCAN_CHUNK = 1 << 20
+_SCAN_MEMO_SIZE = 100_000
+_MISSING = object()
+
+# Lecteur des pages en mode lecture seule (voir configure_reader)
+_direct_reader = True
+_fast_scan = False
+
+
+def configure_reader(direct: bool = True, fast_scan: bool = False):
+    """Lecteur des pages : direct (XlsxReader, defaut) ou openpyxl uniquement.
+
+    fast_scan=True : le lecteur direct balaye le texte des pages ecrites
+    par Excel / openpyxl au lieu de les analyser avec iterparse.
+    """
+    global _direct_reader, _fast_scan
+    _direct_reader = direct
+    _fast_scan = fast_scan
+
+
+def _xml_entity(match) -> str:
+    dec, hexa, name = match.groups()
+    if name:
+        return _XML_ENTITIES[name]
+    return chr(int(dec) if dec else int(hexa, 16))
+
+
+def _xml_text(text: str) -> str:
+    """Texte XML brut -> valeur (fins de ligne normalisees, entites remplacees)."""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in text:
+        text = _XML_ENTITY_RE.sub(_xml_entity, text)
+    return text
+
+
+def _xlsx_sheet_members(zf) -> dict:
+    """{nom de page: membre du zip} d'apres xl/workbook.xml et ses relations."""
+    import xml.etree.ElementTree as ET
+
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target", "") for rel in rels}
+    members = {}
+    for sheet in workbook.iter(_XLSX_MAIN_NS + "sheet"):
+        target = targets.get(sheet.get(_XLSX_REL_NS + "id"), "")
+        members[sheet.get("name")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+    return members
+
+
+def _xlsx_text(node) -> str:
+    """Texte d'un <si> ou <is> : <t> direct et <t> des runs (comme openpyxl Text.content)."""
+    parts = []
+    for child in node:
+        if child.tag == _TEXT_TAG:
+            text = child.text
+        elif child.tag == _RUN_TAG:
+            text = child.findtext(_TEXT_TAG)
+        else:
             continue
-        mat = MaterialSWOOD(
-            name=str(name).strip(),
-            description=_safe_str(_resolve_cell(ws, row, 2)),
-            path=_safe_str(_resolve_cell(ws, row, 3)),
-            thickness=_safe_str(_resolve_cell(ws, row, 4)),
-            fiber_material=_safe_str(_resolve_cell(ws, row, 5)),
-            cost=_safe_str(_resolve_cell(ws, row, 6)),
-            density=_safe_str(_resolve_cell(ws, row, 7)),
-            color=_safe_str(_resolve_cell(ws, row, 8)),
-            transparency=_safe_str(_resolve_cell(ws, row, 9)),
-            texture=_safe_str(_resolve_cell(ws, row, 10)),
-            texture_direction=_safe_str(_resolve_cell(ws, row, 11)),
-            saw_stock=_safe_str(_resolve_cell(ws, row, 12)),
-            saw_reference=_safe_str(_resolve_cell(ws, row, 13)),
-            saw_fiber=_safe_str(_resolve_cell(ws, row, 14)),
-            fiber_speed_factor=_safe_str(_resolve_cell(ws, row, 15)),
-            fiber_angle_correction=_safe_str(_resolve_cell(ws, row, 16)),
-            material_type=_safe_str(_resolve_cell(ws, row, 17)),
-            material_costing_type=_safe_str(_resolve_cell(ws, row, 18)),
-            top_color=_safe_str(_resolve_cell(ws, row, 19)),
-            top_texture=_safe_str(_resolve_cell(ws, row, 20)),
-            top_texture_angle=_safe_str(_resolve_cell(ws, row, 21)),
-            top_texture_image_direction=_safe_str(_resolve_cell(ws, row, 22)),
-            bottom_color=_safe_str(_resolve_cell(ws, row, 23)),
-            bottom_texture=_safe_str(_resolve_cell(ws, row, 24)),
-            bottom_texture_angle=_safe_str(_resolve_cell(ws, row, 25)),
-            bottom_texture_image_direction=_safe_str(_resolve_cell(ws, row, 26)),
-            end_texture=_safe_str(_resolve_cell(ws, row, 27)),
-            sw_material=_safe_str(_resolve_cell(ws, row, 28)),
-            image=_safe_str(_resolve_cell(ws, row, 29)),
-            edge_band_list=_safe_str(_resolve_cell(ws, row, 30)),
-            laminate_impact=_safe_str(_resolve_cell(ws, row, 31)),
-            allow_thickness_calibration=_safe_str(_resolve_cell(ws, row, 32)),
-            min_thickness_calibration=_safe_str(_resolve_cell(ws, row, 33)),
-            machining_cost_factor=_safe_str(_resolve_cell(ws, row, 34)),
-            sw_texture_height=_safe_str(_resolve_cell(ws, row, 35)),
-            top_texture_height=_safe_str(_resolve_cell(ws, row, 36)),
-            bottom_texture_height=_safe_str(_resolve_cell(ws, row, 37)),
-            material_name_top=_safe_str(_resolve_cell(ws, row, 38)),
-            grain_direction_top=_safe_str(_resolve_cell(ws, row, 39)),
-            stock_offset_top=_safe_str(_resolve_cell(ws, row, 40)),
-            material_name_bottom=_safe_str(_resolve_cell(ws, row, 41)),
-            grain_direction_bottom=_safe_str(_resolve_cell(ws, row, 42)),
-            stock_offset_bottom=_safe_str(_resolve_cell(ws, row, 43)),
-            board_l=_safe_str(_resolve_cell(ws, row, 44)),
-            board_w=_safe_str(_resolve_cell(ws, row, 45)),
-            ref_fournisseur=_safe_str(_resolve_cell(ws, row, 46)),
-            fournisseur=_safe_str(_resolve_cell(ws, row, 47)),
-            finish=_safe_str(_resolve_cell(ws, row, 48)),
-            glass=_safe_str(_resolve_cell(ws, row, 49)),
-        )
-        mat.parametres = compute_parametres(mat.board_l)
-        if not mat.saw_reference:
-            mat.saw_reference = compute_saw_reference(mat.name, mat.thickness)
-        materials.append(mat)
-    wb.close()
-    log_func(f"{len(materials)} materiaux lus (49 colonnes)")
-    return materials
+        if text:
+            parts.append(text)
+    return "".join(parts)
+
+
+def _xlsx_fragment(markup: str, ns_decls: str):
+    """Element d'un fragment XML (une cellule <c>) avec les espaces de noms de la page."""
+    import xml.etree.ElementTree as ET
+    return ET.fromstring("<x" + ns_decls + ">" + markup + "</x>")[0]
+
+
+def _xlsx_root_namespaces(head: str) -> Optional[str]:
+    """Declarations xmlns de la racine <worksheet>, None si elle n'a pas la forme
+    attendue (prefixe d'espace de noms...) : la page est alors lue avec iterparse."""
+    match = _XLSX_ROOT_RE.search(head)
+    if match is None:
+        return None
+    decls = "".join(_XLSX_NS_DECL_RE.findall(match.group(1)))
+    if f' xmlns="{_XLSX_MAIN_NS[1:-1]}"' not in decls:
+        return None
+    return decls
+
+
+class XlsxReader:
+    """Lecture des pages d'un XLSX/XLSM directement dans le zip.
+
+    sharedStrings.xml est lu une fois en liste, chaque page est lue en flux
+    avec iterparse, les elements etant liberes ligne par ligne ; sur
+    demande (fast_scan), les pages ecrites par Excel ou openpyxl sont
+    decoupees plus vite (voir _scan_rows et ses limites en tete de
+    section). Les lignes
+    produites sont identiques a celles d'openpyxl en read_only /
+    values_only : memes types (int/float, bool, datetime, formules "=..."
+    avec formules partagees traduites), memes lignes vides, meme largeur.
+    Ni les styles (hors formats de date), ni le projet VBA ne sont charges.
+    """
+
+    def __init__(self, xlsm_path: str, fast_scan: bool = False):
+        import zipfile
+        import xml.etree.ElementTree as ET
+
+        self.fast_scan = fast_scan
+        self.zf = zipfile.ZipFile(xlsm_path)
+        try:
+            self.members = _xlsx_sheet_members(self.zf)
+            workbook_pr = ET.fromstring(self.zf.read("xl/workbook.xml")).find(
+                _XLSX_MAIN_NS + "workbookPr")
+            self.date1904 = (workbook_pr is not None
+                             and workbook_pr.get("date1904") in ("1", "true"))
+            self.date_styles, self.timedelta_styles = self._read_date_styles()
+            self.shared_strings = self._read_shared_strings()
+        except BaseException:
+            self.zf.close()
+            raise
+
+    def close(self):
+        self.zf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.members)
+
+    def _read_shared_strings(self) -> List[str]:
+        import xml.etree.ElementTree as ET
+
+        if "xl/sharedStrings.xml" not in self.zf.NameToInfo:
+            return []
+        strings = []
+        with self.zf.open("xl/sharedStrings.xml") as src:
+            for _, elem in ET.iterparse(src):
+                if elem.tag == _SI_TAG:
+                    strings.append(_xlsx_text(elem).replace("x005F_", ""))
+                    elem.clear()
+        return strings
+
+    def _read_date_styles(self):
+        """Index des styles de cellule (cellXfs) au format date / duree."""
+        import xml.etree.ElementTree as ET
+        from openpyxl.styles.numbers import (builtin_format_code, is_date_format,
+                                             is_timedelta_format)
+
+        if "xl/styles.xml" not in self.zf.NameToInfo:
+            return set(), set()
+        root = ET.fromstring(self.zf.read("xl/styles.xml"))
+        custom = {}
+        num_fmts = root.find(_XLSX_MAIN_NS + "numFmts")
+        if num_fmts is not None:
+            custom = {int(fmt.get("numFmtId")): fmt.get("formatCode")
+                      for fmt in num_fmts.iter(_XLSX_MAIN_NS + "numFmt")}
+        date_styles, timedelta_styles = set(), set()
+        cell_xfs = root.find(_XLSX_MAIN_NS + "cellXfs")
+        for idx, xf in enumerate(cell_xfs if cell_xfs is not None else ()):
+            fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom[fmt_id] if fmt_id in custom else builtin_format_code(fmt_id)
+            if is_date_format(fmt):
+                date_styles.add(idx)
+            if is_timedelta_format(fmt):
+                timedelta_styles.add(idx)
+        return date_styles, timedelta_styles
+
+    def _head(self, member: str) -> str:
+        """Debut du XML d'une page (racine, dimension)."""
+        with self.zf.open(member) as src:
+            return src.read(16384).decode("utf-8", errors="ignore")
+
+    def max_row(self, sheet_name: str) -> int:
+        """Derniere ligne declaree (<dimension>) de la page, 0 si absente."""
+        match = _XLSX_DIMENSION_RE.search(self._head(self.members[sheet_name]))
+        if match is None:
+            return 0
+        last = match.group(2) or match.group(1)
+        return int(last) if last else 0
+
+    def iter_rows(self, sheet_name: str, data_only: bool = False, min_row: int = 1):
+        """Itere les lignes (tuples de valeurs) de la page a partir de min_row.
+
+        Lignes absentes du XML : tuples vides ; chaque tuple s'arrete a la
+        derniere cellule presente de la ligne (comme openpyxl).
+        """
+        if sheet_name not in self.members:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        member = self.members[sheet_name]
+        convert = self._cell_converter(data_only)
+        ns_decls = None
+        if self.fast_scan:
+            ns_decls = _xlsx_root_namespaces(self._head(member))
+        if ns_decls is None:
+            rows = self._parse_rows(member, convert)
+        else:
+            rows = self._scan_rows(member, ns_decls, convert, data_only)
+        counter = min_row
+        for row_number, values in rows:
+            while counter < row_number:
+                counter += 1
+                yield ()
+            if counter > row_number:
+                continue
+            counter += 1
+            yield values
+
+    def _parse_rows(self, member: str, convert):
+        """(numero, valeurs) de chaque ligne, avec iterparse (toute forme de XML)."""
+        import xml.etree.ElementTree as ET
+
+        columns = {}
+        row_number = 0
+        with self.zf.open(member) as src:
+            for _, elem in ET.iterparse(src):
+                if elem.tag == _ROW_TAG:
+                    row_number = _xlsx_row_number(elem.get("r"), row_number)
+                    yield row_number, _xlsx_element_row(elem, convert, columns)
+                    elem.clear()
+
+    def _scan_rows(self, member: str, ns_decls: str, convert, data_only: bool):
+        """(numero, valeurs) de chaque ligne, par decoupage du texte XML.
+
+        Chaque ligne est coupee sur '<c r="' ; la suite de la cellule (style,
+        type, valeur) est convertie une fois puis memorisee : les valeurs
+        repetees d'un catalogue (epaisseurs, chemins, fournisseurs...) ne
+        sont analysees qu'une fois. Des la premiere ligne d'une autre forme,
+        la suite de la page est lue avec _parse_rows.
+        """
+        import codecs
+
+        scan_cell = self._cell_scanner(ns_decls, convert, data_only)
+        memo = {}
+        columns = {}
+        row_number = 0
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = ""
+        with self.zf.open(member) as src:
+            while True:
+                chunk = src.read(_SCAN_CHUNK)
+                buffer += decoder.decode(chunk, final=not chunk)
+                end = len(buffer) if not chunk else buffer.rfind("</row>") + 6
+                if chunk and end < 6:
+                    continue
+                block, buffer = buffer[:end], buffer[end:]
+                for attrs, content in _split_xlsx_rows(block):
+                    number = _XLSX_ROW_NUMBER_RE.search(attrs)
+                    row_number = _xlsx_row_number(number.group(1) if number else None,
+                                                  row_number)
+                    if content is None:
+                        yield row_number, ()
+                        continue
+                    pieces = content.split('<c r="')
+                    # Toute balise "<c..." non decoupee (autre forme de cellule, ou
+                    # <color>/<charset> d'une chaine riche) : suite lue avec iterparse
+                    if pieces[0].strip() or len(pieces) - 1 != content.count("<c"):
+                        for number, values in self._parse_rows(member, convert):
+                            if number >= row_number:
+                                yield number, values
+                        return
+                    values = []
+                    col = 0
+                    for piece in pieces[1:]:
+                        ref, _, tail = piece.partition('"')
+                        letters = ref.rstrip("0123456789")
+                        col = columns.get(letters)
+                        if col is None:
+                            col = columns[letters] = _column_index(letters)
+                        value = memo.get(tail, _MISSING)
+                        if value is _MISSING:
+                            value, cacheable = scan_cell(ref, tail)
+                            if cacheable and len(memo) < _SCAN_MEMO_SIZE:
+                                memo[tail] = value
+                        width = len(values)
+                        if col == width + 1:
+                            values.append(value)
+                        elif col > width:
+                            values.extend([None] * (col - width - 1))
+                            values.append(value)
+                        else:
+                            values[col - 1] = value
+                    # Comme openpyxl : la ligne s'arrete a la derniere cellule lue
+                    del values[col:]
+                    yield row_number, tuple(values)
+                if not chunk:
+                    break
+
+    def _cell_scanner(self, ns_decls: str, convert, data_only: bool):
+        """Fonction (reference, suite de la cellule) -> (valeur, memorisable)."""
+        shared_strings = self.shared_strings
+        date_styles = {str(idx) for idx in self.date_styles}
+        style0_is_date = 0 in self.date_styles
+
+        def from_element(ref, tail):
+            elem = _xlsx_fragment('<c r="' + ref + '"' + tail.rstrip(), ns_decls)
+            return convert(elem, elem.get("r"))
+
+        def scan_cell(ref, tail):
+            match = _XLSX_CELL_TAIL_RE.fullmatch(tail)
+            if match is None:
+                # Forme inhabituelle (formule partagee, chaine riche...)
+                return from_element(ref, tail), False
+            style, data_type, formula, value, inline = match.groups()
+            if formula is not None and not data_only:
+                return "=" + _xml_text(formula), False
+            if data_type == "inlineStr":
+                return (_xml_text(inline) if inline is not None else None), True
+            if not value:
+                return None, True
+            if data_type == "s":
+                return shared_strings[int(value)], True
+            if not data_type or data_type == "n":
+                if style in date_styles if style else style0_is_date:
+                    return from_element(ref, tail), True
+                if "." in value or "E" in value or "e" in value:
+                    return float(value), True
+                return int(value), True
+            if data_type == "b":
+                return bool(int(value)), True
+            if data_type == "d":
+                return from_element(ref, tail), True
+            return _xml_text(value), True
+
+        return scan_cell
+
+    def _cell_converter(self, data_only: bool):
+        """Fonction (element <c>, reference) -> valeur, comme openpyxl."""
+        from openpyxl.utils.datetime import (CALENDAR_MAC_1904, WINDOWS_EPOCH,
+                                             from_excel, from_ISO8601)
+
+        shared_strings = self.shared_strings
+        date_styles = self.date_styles
+        timedelta_styles = self.timedelta_styles
+        epoch = CALENDAR_MAC_1904 if self.date1904 else WINDOWS_EPOCH
+        translators = {}
+
+        def convert(cell, ref):
+            data_type = cell.get("t", "n")
+            value = formula = inline = None
+            for child in cell:
+                tag = child.tag
+                if tag == _VALUE_TAG:
+                    value = child.text or None
+                elif tag == _FORMULA_TAG:
+                    formula = child
+                elif tag == _INLINE_TAG:
+                    inline = child
+            if data_type == "inlineStr":
+                value = None
+
+            if formula is not None and not data_only:
+                return _xlsx_formula(formula, ref, translators)
+            if value is not None:
+                if data_type == "n":
+                    value = (float(value) if "." in value or "E" in value or "e" in value
+                             else int(value))
+                    style = cell.get("s")
+                    style = int(style) if style else 0
+                    if style in date_styles:
+                        try:
+                            return from_excel(value, epoch,
+                                              timedelta=style in timedelta_styles)
+                        except (OverflowError, ValueError):
+                            return "#VALUE!"
+                    return value
+                if data_type == "s":
+                    return shared_strings[int(value)]
+                if data_type == "b":
+                    return bool(int(value))
+                if data_type == "d":
+                    return from_ISO8601(value)
+                return value
+            if data_type == "inlineStr" and inline is not None:
+                return _xlsx_text(inline)
+            return None
 
+        return convert
 
-def read_materials_from_xlsm(xlsm_path: str, log_func=print) -> list:
-    """Lit les colonnes essentielles de la page Materials (export TXT)."""
+
+def _split_xlsx_rows(block: str):
+    """Itere (attributs, contenu) des <row> d'un bloc de XML ; contenu None si <row/>."""
+    for piece in block.split("</row>"):
+        pos = piece.find("<row")
+        while pos != -1:
+            close = piece.find(">", pos)
+            if close == -1:
+                break
+            if piece[pos + 4] not in " \t\r\n/>":
+                # <rowBreaks> apres les donnees
+                pos = piece.find("<row", close)
+                continue
+            attrs = piece[pos + 4:close]
+            if attrs.endswith("/"):
+                yield attrs[:-1], None
+                pos = piece.find("<row", close)
+            else:
+                yield attrs, piece[close + 1:]
+                break
+
+
+def _xlsx_row_number(r: Optional[str], previous: int) -> int:
+    """Numero d'une ligne : attribut r, sinon ligne precedente + 1."""
+    if r is None:
+        return previous + 1
+    return int(r) if r.isdigit() else int(float(r))
+
+
+def _xlsx_row_values(pairs) -> tuple:
+    """[(colonne, valeur)] -> tuple jusqu'a la derniere cellule presente."""
+    if not pairs:
+        return ()
+    values = [None] * pairs[-1][0]
+    width = len(values)
+    for col, value in pairs:
+        if 1 <= col <= width:
+            values[col - 1] = value
+    return tuple(values)
+
+
+def _xlsx_element_row(elem, convert, columns: dict) -> tuple:
+    """Valeurs d'un element <row> (cellules sans reference : colonne suivante)."""
+    pairs = []
+    col = 0
+    for cell in elem:
+        if cell.tag != _CELL_TAG:
+            continue
+        ref = cell.get("r")
+        if ref:
+            letters = ref.rstrip("0123456789")
+            col = columns.get(letters)
+            if col is None:
+                col = columns[letters] = _column_index(letters)
+        else:
+            col += 1
+        pairs.append((col, convert(cell, ref)))
+    return _xlsx_row_values(pairs)
+
+
+def _xlsx_formula(formula, ref: str, translators: dict):
+    """Formule d'une cellule ("=..."), formules partagees traduites comme openpyxl."""
+    formula_type = formula.get("t")
+    value = "="
+    if formula.text is not None:
+        value += formula.text
+    if formula_type == "shared":
+        idx = formula.get("si")
+        if idx in translators:
+            return translators[idx].translate_formula(ref)
+        if value != "=":
+            from openpyxl.formula.translate import Translator
+            translators[idx] = Translator(value, ref)
+    elif formula_type == "array":
+        from openpyxl.worksheet.formula import ArrayFormula
+        return ArrayFormula(ref=formula.get("ref"), text=value)
+    elif formula_type == "dataTable":
+        from openpyxl.worksheet.formula import DataTableFormula
+        return DataTableFormula(**formula.attrib)
+    return value
+
+
+def _open_direct_reader(xlsm_path: str) -> Optional[XlsxReader]:
+    """XlsxReader du classeur, ou None (lecteur desactive ou fichier non reconnu :
+    openpyxl prend alors le relais et signale lui-meme les erreurs)."""
+    if not _direct_reader:
+        return None
+    import zipfile
+
+    try:
+        return XlsxReader(xlsm_path, fast_scan=_fast_scan)
+    except (OSError, KeyError, ValueError, SyntaxError, zipfile.BadZipFile):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Cache disque des classeurs lus
+# ---------------------------------------------------------------------------
+
+# A incrementer si le contenu d'un snapshot change (entrees anterieures ignorees)
+CACHE_FORMAT_VERSION = 1
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _default_cache_dir() -> str:
+    """Dossier cache utilisateur (DESTRIIMPORT_CACHE_DIR prioritaire)."""
+    path = os.environ.get("DESTRIIMPORT_CACHE_DIR")
+    if path:
+        return path
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "DestriImport", "cache")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WorkbookCache:
+    """Cache disque des WorkbookSnapshot (lignes brutes des pages, tags/headers compris).
+
+    Une entree par (chemin du XLSM, mode data_only). Elle est valide si la
+    taille et la date de modification du fichier n'ont pas change ; sinon le
+    contenu est re-hashe (SHA-256) et compare a celui enregistre, ce qui
+    garde l'entree apres une simple copie ou un "touch" (la nouvelle date
+    est alors enregistree : le fichier n'est re-hashe qu'une fois).
+    Les entrees sont des pickles de donnees simples (tuples de valeurs), pas
+    d'objets de ce module : elles restent lisibles depuis l'exe, le script
+    ou un import. Au-dela de max_bytes, les entrees les moins recemment
+    utilisees sont supprimees.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, xlsm_path: str, data_only: bool) -> str:
+        key = f"{os.path.normcase(os.path.abspath(xlsm_path))}|{int(data_only)}"
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    @staticmethod
+    def file_meta(xlsm_path: str) -> dict:
+        """Cle de validite du fichier : taille, mtime et hash du contenu."""
+        st = os.stat(xlsm_path)
+        return {"version": CACHE_FORMAT_VERSION, "app_version": APP_VERSION,
+                "path": os.path.abspath(xlsm_path), "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(xlsm_path)}
+
+    def get(self, xlsm_path: str, data_only: bool) -> Optional[WorkbookSnapshot]:
+        """Snapshot en cache si le fichier est inchange, sinon None."""
+        entry = self._entry_path(xlsm_path, data_only)
+        try:
+            with open(entry, "rb") as f:
+                meta = pickle.load(f)
+                if (meta.get("version") != CACHE_FORMAT_VERSION
+                        or meta.get("app_version") != APP_VERSION):
+                    raise ValueError("format de cache obsolete")
+                st = os.stat(xlsm_path)
+                if st.st_size != meta["size"]:
+                    return None
+                rehashed = st.st_mtime_ns != meta["mtime_ns"]
+                if rehashed and _file_sha256(xlsm_path) != meta["sha256"]:
+                    return None
+                sheet_rows = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Entree illisible ou obsolete : supprimee, le classeur sera relu
+            self._remove(entry)
+            return None
+        try:
+            if rehashed:
+                # Contenu identique, date differente (copie, "touch") : la
+                # nouvelle date est enregistree pour ne plus re-hasher le fichier
+                self._write(entry, dict(meta, path=os.path.abspath(xlsm_path),
+                                        mtime_ns=st.st_mtime_ns), sheet_rows)
+            else:
+                os.utime(entry)  # ordre LRU pour l'eviction
+        except OSError:
+            pass
+        return WorkbookSnapshot.from_rows(xlsm_path, data_only, sheet_rows)
+
+    def put(self, snapshot: WorkbookSnapshot, meta: dict):
+        """Enregistre le snapshot (meta calculee AVANT la lecture du fichier)."""
+        # Dossier reserve a l'utilisateur : les entrees sont des pickles
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        entry = self._entry_path(snapshot.xlsm_path, snapshot.data_only)
+        self._write(entry, meta, {name: sheet.rows for name, sheet in snapshot.sheets.items()})
+        self.evict(keep=entry)
+
+    def _write(self, entry: str, meta: dict, sheet_rows: dict):
+        """Ecriture atomique d'une entree (meta puis lignes des pages)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(sheet_rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def evict(self, keep: Optional[str] = None):
+        """Supprime les entrees les plus anciennes tant que le cache depasse max_bytes."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Vide le cache."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith((".pkl", ".tmp")):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Cache utilise par load_snapshot (None : desactive). Il est optionnel
+# (--cache, case "Cache" de l'interface) : ses entrees sont des pickles, a ne
+# charger que depuis un dossier choisi par l'utilisateur
+_workbook_cache: Optional[WorkbookCache] = None
+
+
+def configure_cache(enabled: bool = True, cache_dir: Optional[str] = None,
+                    max_bytes: int = CACHE_MAX_BYTES) -> Optional[WorkbookCache]:
+    """Active / desactive le cache disque des classeurs et retourne le cache actif."""
+    global _workbook_cache
+    _workbook_cache = WorkbookCache(cache_dir, max_bytes) if enabled else None
+    return _workbook_cache
+
+
+def load_snapshot(xlsm_path: str, data_only: bool = False, log_func=print,
+                  progress_func=None) -> WorkbookSnapshot:
+    """WorkbookSnapshot du classeur, depuis le cache disque si le fichier est inchange.
+
+    Une erreur du cache (dossier non inscriptible, entree corrompue) ne fait
+    jamais echouer l'export : le classeur est simplement relu avec openpyxl.
+    """
+    cache = _workbook_cache
+    if cache is None:
+        return WorkbookSnapshot(xlsm_path, data_only=data_only, progress_func=progress_func)
+
+    with _timed("load"):
+        snapshot = cache.get(xlsm_path, data_only)
+    if snapshot is not None:
+        _count("cache_hits")
+        log_func("Cache : classeur inchange, lecture XLSM evitee")
+        return snapshot
+
+    try:
+        meta = cache.file_meta(xlsm_path)
+    except OSError:
+        meta = None
+    snapshot = WorkbookSnapshot(xlsm_path, data_only=data_only, progress_func=progress_func)
+    if meta is not None:
+        try:
+            cache.put(snapshot, meta)
+        except Exception:
+            pass
+    return snapshot
+
+
+# ---------------------------------------------------------------------------
+# Lecture XLSM - Page Materials (complete, 49 colonnes)
+# ---------------------------------------------------------------------------
+
+_SIMPLE_REF_RE = re.compile(r"^=([A-Z]{1,3})(\d+)$")
+
+# Issues d'une chaine de references qui ne donne pas de valeur
+_UNRESOLVED = object()  # la chaine aboutit a une formule complexe
+_CYCLE = object()       # la chaine boucle sur elle-meme
+
+
+def _column_index(letters: str) -> int:
+    """Convertit des lettres de colonne Excel en numero (A -> 1, AT -> 46)."""
+    col = 0
+    for ch in letters:
+        col = col * 26 + (ord(ch) - ord('A') + 1)
+    return col
+
+
+def _column_letter(col: int) -> str:
+    """Convertit un numero de colonne en lettres Excel (46 -> AT)."""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _resolve_formula_grid(sheet: SheetData) -> List[tuple]:
+    """Resout en une passe toutes les formules simples (=XX123) d'une page.
+
+    Les chaines de references (=B5 -> =C5 -> valeur) sont suivies jusqu'a
+    la valeur finale, chaque cellule n'etant resolue qu'une fois (memo).
+    - chaine aboutissant a une formule complexe : la cellule garde sa formule
+    - reference circulaire : la cellule vaut None et est notee dans
+      sheet.formula_cycles
+    Les formules complexes (=IF(...)) restent telles quelles.
+    """
+    memo = {}
+    cycles = []
+
+    def follow(start, formula):
+        chain = [start]
+        on_chain = {start}
+        m = _SIMPLE_REF_RE.match(formula)
+        cur = (int(m.group(2)), _column_index(m.group(1)))
+        while True:
+            if cur in on_chain:
+                outcome = _CYCLE
+                break
+            if cur in memo:
+                outcome = memo[cur]
+                break
+            val = sheet.value(*cur)
+            if not (isinstance(val, str) and val.startswith("=")):
+                outcome = val
+                break
+            m = _SIMPLE_REF_RE.match(val)
+            if m is None:
+                outcome = _UNRESOLVED
+                break
+            chain.append(cur)
+            on_chain.add(cur)
+            cur = (int(m.group(2)), _column_index(m.group(1)))
+        for cell in chain:
+            memo[cell] = outcome
+        return outcome
+
+    resolved = list(sheet.rows)
+    count = 0
+    for r, values in enumerate(sheet.rows, start=1):
+        new_values = None
+        for c, val in enumerate(values, start=1):
+            if not (isinstance(val, str) and val.startswith("=")):
+                continue
+            if _SIMPLE_REF_RE.match(val) is None:
+                continue
+            outcome = memo.get((r, c))
+            if outcome is None and (r, c) not in memo:
+                outcome = follow((r, c), val)
+            if outcome is _UNRESOLVED:
+                continue
+            if new_values is None:
+                new_values = list(values)
+            if outcome is _CYCLE:
+                new_values[c - 1] = None
+                cycles.append(f"{_column_letter(c)}{r}")
+            else:
+                new_values[c - 1] = outcome
+                count += 1
+        if new_values is not None:
+            resolved[r - 1] = tuple(new_values)
+
+    sheet.formulas_resolved = count
+    sheet.formula_cycles = cycles
+    _count("formulas_resolved", count)
+    if cycles:
+        _count("formula_cycles", len(cycles))
+    return resolved
+
+
+def _log_formula_cycles(sheet: SheetData, log_func=print):
+    """Signale les references circulaires detectees lors de la resolution."""
+    if sheet.formula_cycles:
+        cells = ", ".join(sheet.formula_cycles[:10])
+        if len(sheet.formula_cycles) > 10:
+            cells += ", ..."
+        log_func(f"ATTENTION : {len(sheet.formula_cycles)} reference(s) circulaire(s) "
+                 f"dans '{sheet.name}' (valeur vide) : {cells}")
+
+
+def read_material_table_from_xlsm(xlsm_path: str, log_func=print,
+                                  snapshot: Optional[WorkbookSnapshot] = None,
+                                  progress_func=None) -> MaterialTable:
+    """Lit TOUTES les colonnes de la page Materials (49 colonnes) en MaterialTable."""
+    log_func(f"Lecture de : {os.path.basename(xlsm_path)} (Materials - complet)")
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    ws = snapshot.sheet("Materials")
+    total = ws.max_row - 4
+    rows = []
+    with _timed("load"):
+        for row, values in ws.data_rows(49, resolved=True):
+            if progress_func is not None:
+                progress_func(row - 4, total)
+            rows.append(values)
+        table = MaterialTable.from_rows(rows)
+    _log_formula_cycles(ws, log_func)
+    log_func(f"{len(table)} materiaux lus (49 colonnes)")
+    return table
+
+
+def read_all_materials_from_xlsm(xlsm_path: str, log_func=print,
+                                 snapshot: Optional[WorkbookSnapshot] = None,
+                                 progress_func=None) -> List[MaterialSWOOD]:
+    """Lit TOUTES les colonnes de la page Materials (49 colonnes)."""
+    return read_material_table_from_xlsm(xlsm_path, log_func, snapshot=snapshot,
+                                         progress_func=progress_func).to_list()
+
+
+def _has_formulas(sheet: SheetData, columns) -> bool:
+    """Vrai si une des colonnes (index base 0) contient encore une formule (row 5+)."""
+    for values in sheet.resolved_rows()[4:]:
+        for c in columns:
+            if c < len(values):
+                val = values[c]
+                if isinstance(val, str) and val.startswith("="):
+                    return True
+    return False
+
+
+def _calculated_data_rows(xlsm_path: str, snapshot: Optional[WorkbookSnapshot],
+                          sheet_name: str, width: int, columns, log_func=print,
+                          progress_func=None):
+    """Lignes de donnees (row 5+) avec les valeurs calculees d'une page.
+
+    - sans snapshot : valeurs calculees (data_only=True), depuis le cache
+      disque si actif, sinon lues en flux
+    - snapshot data_only : lu tel quel
+    - snapshot en mode formules : references simples resolues ; si une des
+      colonnes lues contient une formule complexe, seule la valeur calculee
+      par Excel est exploitable et la page est relue en flux (data_only).
+    Leve KeyError si la page n'existe pas.
+    """
+    if snapshot is not None:
+        sheet = snapshot.sheet(sheet_name)
+        if snapshot.data_only:
+            return sheet.data_rows(width)
+        if not _has_formulas(sheet, columns):
+            return sheet.data_rows(width, resolved=True)
+        log_func(f"Formules dans '{sheet_name}' : relecture des valeurs calculees")
+    if _workbook_cache is not None:
+        snapshot = load_snapshot(xlsm_path, data_only=True, log_func=log_func,
+                                 progress_func=progress_func)
+        return snapshot.sheet(sheet_name).data_rows(width)
+    return _iter_data_rows(iter_sheet_rows(xlsm_path, sheet_name, data_only=True,
+                                           min_row=5, progress_func=progress_func), width)
+
+
+# Colonnes (base 0) lues par read_materials_from_xlsm
+_TXT_MATERIAL_COLUMNS = (0, 3, 4, 5, 43, 44, 45)
+
+
+def read_materials_from_xlsm(xlsm_path: str, log_func=print,
+                             snapshot: Optional[WorkbookSnapshot] = None,
+                             progress_func=None,
+                             validator: Optional["_SheetValidator"] = None) -> list:
+    """Lit les colonnes essentielles de la page Materials (export TXT).
+
+    Lit les valeurs calculees (data_only), voir _calculated_data_rows.
+    validator controle chaque ligne lue au passage (validation de l'export TXT).
+    """
     log_func(f"Lecture de : {os.path.basename(xlsm_path)}")
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=True)
-    ws = wb["Materials"]
+    rows = _calculated_data_rows(xlsm_path, snapshot, "Materials", 46, _TXT_MATERIAL_COLUMNS,
+                                 log_func, progress_func)
+    if validator is not None:
+        rows = validator.watch(rows)
     materials = []
-    for row in range(5, ws.max_row + 1):
-        name = ws.cell(row=row, column=1).value
-        if not name or str(name).strip() == "":
-            continue
-        mat = MaterialSWOOD(
-            name=str(name).strip(),
-            thickness=_safe_str(ws.cell(row=row, column=4).value),
-            fiber_material=_safe_str(ws.cell(row=row, column=5).value),
-            cost=ws.cell(row=row, column=6).value,
-            board_l=_safe_str(ws.cell(row=row, column=44).value),
-            board_w=_safe_str(ws.cell(row=row, column=45).value),
-            ref_fournisseur=_safe_str(ws.cell(row=row, column=46).value),
-        )
-        mat.saw_reference = compute_saw_reference(mat.name, mat.thickness)
-        mat.parametres = compute_parametres(mat.board_l)
-        mat.cost = format_cost(mat.cost)
-        materials.append(mat)
-    wb.close()
+    with _timed("load"):
+        for row, values in rows:
+            name = values[0]
+            if not name or str(name).strip() == "":
+                continue
+            mat = MaterialSWOOD(
+                name=str(name).strip(),
+                thickness=_safe_str(values[3]),
+                fiber_material=_safe_str(values[4]),
+                cost=values[5],
+                board_l=_safe_str(values[43]),
+                board_w=_safe_str(values[44]),
+                ref_fournisseur=_safe_str(values[45]),
+            )
+            mat.saw_reference = compute_saw_reference(mat.name, mat.thickness)
+            mat.cost = format_cost(mat.cost)
+            materials.append(mat)
+        for mat, parametres in zip(materials, parametres_column([m.board_l for m in materials])):
+            mat.parametres = parametres
     log_func(f"{len(materials)} materiaux lus")
     return materials
 
@@ -320,49 +1845,53 @@ def read_materials_from_xlsm(xlsm_path: str, log_func=print) -> list:
 # Lecture XLSM - Page EdgeBands
 # ---------------------------------------------------------------------------
 
-def read_edgebands_from_xlsm(xlsm_path: str, log_func=print) -> List[EdgeBandSWOOD]:
-    """Lit la page EdgeBands du XLSM (23 colonnes)."""
-    log_func(f"Lecture de : {os.path.basename(xlsm_path)} (EdgeBands)")
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=True)
+def read_edgebands_from_xlsm(xlsm_path: str, log_func=print,
+                             snapshot: Optional[WorkbookSnapshot] = None,
+                             progress_func=None) -> List[EdgeBandSWOOD]:
+    """Lit la page EdgeBands du XLSM (23 colonnes).
 
-    if "EdgeBands" not in wb.sheetnames:
+    Lit les valeurs calculees (data_only), voir _calculated_data_rows.
+    """
+    log_func(f"Lecture de : {os.path.basename(xlsm_path)} (EdgeBands)")
+    try:
+        rows = _calculated_data_rows(xlsm_path, snapshot, "EdgeBands", 23, range(23),
+                                     log_func, progress_func)
+    except KeyError:
         log_func("ERREUR : Page 'EdgeBands' introuvable dans le XLSM.")
-        wb.close()
         return []
 
-    ws = wb["EdgeBands"]
     edgebands = []
-    for row in range(5, ws.max_row + 1):
-        name = ws.cell(row=row, column=1).value
-        if not name or str(name).strip() == "":
-            continue
-        eb = EdgeBandSWOOD(
-            name=str(name).strip(),
-            id_val=_safe_str(ws.cell(row=row, column=2).value),
-            description=_safe_str(ws.cell(row=row, column=3).value),
-            path=_safe_str(ws.cell(row=row, column=4).value),
-            cost=_safe_str(ws.cell(row=row, column=5).value),
-            reference=_safe_str(ws.cell(row=row, column=6).value),
-            thickness=_safe_str(ws.cell(row=row, column=7).value),
-            color=_safe_str(ws.cell(row=row, column=8).value),
-            image_path=_safe_str(ws.cell(row=row, column=9).value),
-            creation_corps=_safe_str(ws.cell(row=row, column=10).value),
-            stock_offset=_safe_str(ws.cell(row=row, column=11).value),
-            width_min=_safe_str(ws.cell(row=row, column=12).value),
-            width_max=_safe_str(ws.cell(row=row, column=13).value),
-            width=_safe_str(ws.cell(row=row, column=14).value),
-            force_stock_exclusion=_safe_str(ws.cell(row=row, column=15).value),
-            shape_id=_safe_str(ws.cell(row=row, column=16).value),
-            end_shape_id=_safe_str(ws.cell(row=row, column=17).value),
-            use_mitre_cut=_safe_str(ws.cell(row=row, column=18).value),
-            texture_height=_safe_str(ws.cell(row=row, column=19).value),
-            eb_additional_shape_id=_safe_str(ws.cell(row=row, column=20).value),
-            ebw_finish=_safe_str(ws.cell(row=row, column=21).value),
-            finish=_safe_str(ws.cell(row=row, column=22).value),
-            eb_supplier=_safe_str(ws.cell(row=row, column=23).value),
-        )
-        edgebands.append(eb)
-    wb.close()
+    with _timed("load"):
+        for row, values in rows:
+            name = values[0]
+            if not name or str(name).strip() == "":
+                continue
+            eb = EdgeBandSWOOD(
+                name=str(name).strip(),
+                id_val=_safe_str(values[1]),
+                description=_safe_str(values[2]),
+                path=_safe_str(values[3]),
+                cost=_safe_str(values[4]),
+                reference=_safe_str(values[5]),
+                thickness=_safe_str(values[6]),
+                color=_safe_str(values[7]),
+                image_path=_safe_str(values[8]),
+                creation_corps=_safe_str(values[9]),
+                stock_offset=_safe_str(values[10]),
+                width_min=_safe_str(values[11]),
+                width_max=_safe_str(values[12]),
+                width=_safe_str(values[13]),
+                force_stock_exclusion=_safe_str(values[14]),
+                shape_id=_safe_str(values[15]),
+                end_shape_id=_safe_str(values[16]),
+                use_mitre_cut=_safe_str(values[17]),
+                texture_height=_safe_str(values[18]),
+                eb_additional_shape_id=_safe_str(values[19]),
+                ebw_finish=_safe_str(values[20]),
+                finish=_safe_str(values[21]),
+                eb_supplier=_safe_str(values[22]),
+            )
+            edgebands.append(eb)
     log_func(f"{len(edgebands)} chants lus")
     return edgebands
 
@@ -371,8 +1900,10 @@ def read_edgebands_from_xlsm(xlsm_path: str, log_func=print) -> List[EdgeBandSWO
 # Utilitaire XML
 # ---------------------------------------------------------------------------
 
-def _pretty_xml(root_element: ET.Element) -> str:
+def _pretty_xml(root_element: "ET.Element") -> str:
     """Genere un XML proprement indente avec declaration UTF-8."""
+    import xml.etree.ElementTree as ET
+    from xml.dom import minidom
     rough = ET.tostring(root_element, encoding="unicode")
     parsed = minidom.parseString(rough)
     pretty = parsed.toprettyxml(indent="  ", encoding=None)
@@ -389,185 +1920,747 @@ def _pretty_xml(root_element: ET.Element) -> str:
     return "\n".join(cleaned)
 
 
-def _create_swood_root() -> ET.Element:
-    """Cree l'element racine <SWOODMat> avec les bons namespaces."""
-    root = ET.Element("SWOODMat")
-    root.set("xmlns:xsd", SWOOD_XSD)
-    root.set("xmlns:xsi", SWOOD_XSI)
-    root.set("Version", SWOOD_VERSION)
-    root.set("xmlns", SWOOD_XMLNS)
-    return root
+def _create_swood_root() -> "ET.Element":
+    """Cree l'element racine <SWOODMat> avec les bons namespaces."""
+    import xml.etree.ElementTree as ET
+    root = ET.Element("SWOODMat")
+    root.set("xmlns:xsd", SWOOD_XSD)
+    root.set("xmlns:xsi", SWOOD_XSI)
+    root.set("Version", SWOOD_VERSION)
+    root.set("xmlns", SWOOD_XMLNS)
+    return root
+
+
+# ---------------------------------------------------------------------------
+# Fichiers de sortie
+# ---------------------------------------------------------------------------
+
+# Traitement par lot : les classeurs d'un lot peuvent ecrire dans le meme
+# dossier a la meme seconde. Le nom du classeur est alors ajoute aux noms de
+# sortie et un fichier existant n'est jamais remplace (voir configure_output)
+_output_tag: Optional[str] = None
+_output_no_clobber = False
+
+
+def configure_output(tag: Optional[str] = None, no_clobber: bool = False):
+    """Nommage des fichiers de sortie.
+
+    tag : insere dans les noms ({prefix}_{tag}_{horodatage}.{ext}), en
+          general le nom du classeur exporte dans un lot.
+    no_clobber : refuser de remplacer un fichier existant (FileExistsError)
+          plutot que l'ecraser.
+    """
+    global _output_tag, _output_no_clobber
+    _output_tag = tag
+    _output_no_clobber = no_clobber
+
+
+def _output_path(xlsm_path: str, output_dir: Optional[str], prefix: str, ext: str,
+                 timestamp: Optional[str] = None):
+    """Retourne (chemin, nom) du fichier d'export horodate.
+
+    Sans output_dir, le fichier est cree dans le dossier du XLSM.
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(os.path.abspath(xlsm_path))
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if _output_tag:
+        filename = f"{prefix}_{_output_tag}_{timestamp}.{ext}"
+    else:
+        filename = f"{prefix}_{timestamp}.{ext}"
+    return os.path.join(output_dir, filename), filename
+
+
+# Les exports sont generes avec "\n" : la fin de ligne (CRLF, comme la macro
+# VBA sous Windows) et l'encodage sont appliques a l'ecriture par _open_output
+OUTPUT_NEWLINE = "\r\n"
+OUTPUT_ENCODING = "utf-8"
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
+@contextmanager
+def _open_output(output_path: str, newline: str = OUTPUT_NEWLINE,
+                 encoding: str = OUTPUT_ENCODING):
+    """Ouvre un fichier de sortie en ecriture atomique.
+
+    Le texte est ecrit dans un fichier temporaire du dossier cible (tampon de
+    OUTPUT_BUFFER_SIZE octets), synchronise sur disque puis renomme en
+    output_path : SWOOD ou Optiplanning ne lisent jamais un fichier a moitie
+    ecrit, et un echec ne laisse ni temporaire ni ancien fichier ecrase.
+    Chaque "\n" ecrit devient `newline`.
+    Si des mesures sont actives, chaque write() est impute a la phase write.
+    Avec configure_output(no_clobber=True), un fichier existant n'est pas
+    remplace : FileExistsError, et le temporaire est supprime.
+    """
+    directory, filename = os.path.split(os.path.abspath(output_path))
+    tmp_path = os.path.join(directory, f".~{filename}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "x", encoding=encoding, newline=newline,
+                  buffering=OUTPUT_BUFFER_SIZE) as f:
+            yield f if _metrics is None else _MeasuredFile(f, _metrics)
+            with _timed("write"):
+                f.flush()
+                os.fsync(f.fileno())
+        with _timed("write"):
+            if _output_no_clobber:
+                _rename_no_clobber(tmp_path, output_path)
+            else:
+                os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _record_output(output_path)
+
+
+def _rename_no_clobber(tmp_path: str, output_path: str):
+    """Renomme tmp_path en output_path sans jamais ecraser un fichier existant."""
+    try:
+        if os.name == "nt":
+            # Sous Windows, rename refuse une cible existante
+            os.rename(tmp_path, output_path)
+        else:
+            # link echoue de facon atomique si la cible existe
+            os.link(tmp_path, output_path)
+            os.remove(tmp_path)
+    except FileExistsError:
+        raise FileExistsError(f"{output_path} existe deja (ecrit par un autre export ?), "
+                              f"fichier non remplace") from None
+
+
+# ---------------------------------------------------------------------------
+# Validation des lignes avant export
+# ---------------------------------------------------------------------------
+
+VALIDATION_MODES = ("off", "report", "block")
+VALIDATION_LOG_LIMIT = 20
+
+# Validation avant ecriture des exports (voir configure_validation)
+_validation_mode = "report"
+_validation_report_dir: Optional[str] = None
+
+# Colonnes numeriques controlees par page : (index base 0, consequence si vide).
+# Consequence None : cellule vide acceptee (attribut omis par la macro) ;
+# "erreur" : valeur obligatoire ; sinon avertissement avec ce texte.
+_VALIDATED_NUMBERS = {
+    "Materials": (
+        (MATERIAL_FIELDS.index("thickness"), "erreur"),
+        (MATERIAL_FIELDS.index("cost"), "cout par defaut (1.50 TXT, 0 Nesting)"),
+        (MATERIAL_FIELDS.index("board_l"), "longueur par defaut (2800 mm)"),
+        (MATERIAL_FIELDS.index("board_w"), "largeur par defaut (2070 mm)"),
+    ),
+    "EdgeBands": tuple((i, None) for i, f in enumerate(fields(EdgeBandSWOOD))
+                       if f.name in ("cost", "thickness", "width")),
+}
+# Pages exportees seulement par le moteur VBA, qui ecrit "2,5" en "2.5" :
+# la virgule decimale y est acceptee (pas dans Materials, lue aussi par le Nesting)
+_VBA_ONLY_SHEETS = ("EdgeBands",)
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+def configure_validation(mode: str = "report", report_dir: Optional[str] = None):
+    """Validation des lignes avant chaque export.
+
+    "report" (defaut) : problemes journalises, export ecrit ;
+    "block" : aucun fichier ecrit si une erreur est trouvee ; "off" : aucun controle.
+    report_dir : dossier ou ecrire le rapport complet quand il depasse
+    VALIDATION_LOG_LIMIT problemes (None : journal seulement ; jamais dans
+    le dossier d'export par defaut, lu par Optiplanning / SWOOD).
+    """
+    global _validation_mode, _validation_report_dir
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Mode de validation inconnu : {mode} "
+                         f"(valides : {', '.join(VALIDATION_MODES)})")
+    _validation_mode = mode
+    _validation_report_dir = report_dir
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class ValidationIssue:
+    """Un probleme d'une cellule (ou d'une ligne) du XLSM."""
+    sheet: str
+    row: int
+    column: int
+    header: str
+    message: str
+    error: bool = True
+
+    def __str__(self) -> str:
+        level = "ERREUR" if self.error else "ATTENTION"
+        header = f" ({self.header})" if self.header else ""
+        return (f"{level} {self.sheet}!{_column_letter(self.column)}{self.row}"
+                f"{header} : {self.message}")
+
+
+class ValidationReport:
+    """Resultat de validate_snapshot : tous les problemes, dans l'ordre des pages et lignes."""
+
+    def __init__(self, issues: List[ValidationIssue], rows: int = 0):
+        self.issues = issues
+        self.rows = rows
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.error]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if not issue.error]
+
+    def log(self, log_func=print, limit: int = VALIDATION_LOG_LIMIT):
+        errors = len(self.errors)
+        log_func(f"Validation : {self.rows} lignes, {errors} erreur(s), "
+                 f"{len(self.issues) - errors} avertissement(s)")
+        for issue in self.issues[:limit]:
+            log_func(f"  {issue}")
+        if len(self.issues) > limit:
+            log_func(f"  ... {len(self.issues) - limit} autre(s)")
+
+    def write(self, path: str):
+        """Rapport complet, une ligne par probleme (tabulations), ecrit de facon atomique."""
+        with _open_output(path) as f:
+            for issue in self.issues:
+                f.write(f"{'ERREUR' if issue.error else 'ATTENTION'}\t{issue.sheet}\t"
+                        f"{_column_letter(issue.column)}{issue.row}\t{issue.header}\t"
+                        f"{issue.message}\n")
+
+
+def _is_number(value) -> bool:
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class _SheetValidator:
+    """Controles des lignes de donnees d'une page (voir validate_snapshot).
+
+    check() est appele sur chaque ligne, depuis un snapshot ou au fil d'une
+    lecture en flux (watch) ; report() ajoute les avertissements par colonne
+    et les references circulaires. Les doublons sont detectes par
+    dictionnaire, et chaque texte numerique distinct n'est converti qu'une fois.
+    columns : colonnes (base 0) ou chercher les formules ; None : toutes.
+    """
+
+    def __init__(self, sheet_name: str, headers=(), columns=None):
+        self.sheet_name = sheet_name
+        self.headers = headers
+        self.columns = columns
+        self.issues = []
+        self.rows = 0
+        self.numbers = _VALIDATED_NUMBERS.get(sheet_name, ())
+        self.width = max([j + 1 for j, _ in self.numbers] + [j + 1 for j in columns or ()],
+                         default=0)
+        self._as_written = _format_cell_value if sheet_name in _VBA_ONLY_SHEETS else None
+        self._first_row = {}
+        self._numeric = {}
+        self._formulas = {}
+
+    def _header(self, j: int) -> str:
+        return self.headers[j] if j < len(self.headers) else ""
+
+    def _add(self, row: int, j: int, message: str, error: bool = True):
+        self.issues.append(ValidationIssue(self.sheet_name, row, j + 1, self._header(j),
+                                           message, error))
+
+    def check(self, row: int, values: tuple):
+        """Controle une ligne (numero XLSM, valeurs) ; les lignes sans Name sont ignorees."""
+        name = values[0] if values else None
+        if not name or str(name).strip() == "":
+            return
+        if len(values) < self.width:
+            values = values + (None,) * (self.width - len(values))
+        self.rows += 1
+        key = str(name).strip()
+        seen = self._first_row.setdefault(key, row)
+        if seen != row:
+            self._add(row, 0, f"Name en double (deja ligne {seen}) : {key}")
+        numeric = self._numeric
+        for j, if_empty in self.numbers:
+            value = values[j]
+            if value is None or (value.__class__ is str and not value.strip()):
+                if if_empty is not None:
+                    error = if_empty == "erreur"
+                    self._add(row, j, "valeur obligatoire vide" if error
+                              else f"vide : {if_empty}", error)
+                continue
+            ok = numeric.get(value)
+            if ok is None:
+                ok = numeric[value] = _is_number(self._as_written(value) if self._as_written
+                                                 else value)
+            if not ok and not (value.__class__ is str and value.startswith("=")):
+                self._add(row, j, f"valeur non numerique : {value!r}")
+        for j, value in (enumerate(values) if self.columns is None
+                         else ((j, values[j]) for j in self.columns)):
+            if value.__class__ is str and value.startswith("="):
+                if _SIMPLE_REF_RE.match(value):
+                    self._add(row, j, f"reference non resolue (la chaine aboutit "
+                                      f"a une formule) : {value}")
+                else:
+                    self._formulas.setdefault(j, [row, 0, value])[1] += 1
+
+    def watch(self, rows):
+        """Itere (numero_ligne, valeurs) en controlant chaque ligne au passage.
+
+        Le temps des controles est impute a la phase validate.
+        """
+        check = self.check
+        metrics = _metrics
+        for row, values in rows:
+            if metrics is None:
+                check(row, values)
+            else:
+                start = time.perf_counter()
+                check(row, values)
+                metrics.charge("validate", time.perf_counter() - start)
+            yield row, values
+
+    def report(self, formula_cycles=()) -> ValidationReport:
+        """Problemes de la page, tries par ligne puis colonne."""
+        issues = list(self.issues)
+        # Formules complexes (=IF(...)) : ecrites telles quelles par la macro,
+        # comme avant ; un avertissement par colonne
+        for j, (row, count, value) in self._formulas.items():
+            issues.append(ValidationIssue(
+                self.sheet_name, row, j + 1, self._header(j),
+                f"{count} formule(s) non calculee(s), ecrite(s) telle(s) quelle(s) : "
+                f"{value[:60]}", error=False))
+        for cell in formula_cycles:
+            m = _CELL_REF_RE.fullmatch(cell)
+            if m:
+                col = _column_index(m.group(1))
+                issues.append(ValidationIssue(self.sheet_name, int(m.group(2)), col,
+                                              self._header(col - 1),
+                                              "reference circulaire (valeur vide)"))
+        issues.sort(key=lambda issue: (issue.row, issue.column))
+        return ValidationReport(issues, self.rows)
+
+
+def validate_snapshot(snapshot: "WorkbookSnapshot",
+                      sheet_names=SNAPSHOT_SHEETS) -> ValidationReport:
+    """Controle en une passe les lignes de donnees (row 5+) lues par les exports.
+
+    Signale par page / ligne / colonne : Name en double, valeurs numeriques
+    vides (valeur par defaut des exports) ou non numeriques, references
+    simples non resolues, references circulaires ; les formules complexes
+    ecrites telles quelles sont un avertissement par colonne. Les lignes
+    sans Name sont ignorees, comme dans les exports.
+    """
+    issues = []
+    rows_checked = 0
+    for sheet_name in sheet_names:
+        if not snapshot.has_sheet(sheet_name):
+            continue
+        ws = snapshot.sheet(sheet_name)
+        validator = _SheetValidator(sheet_name, ws.headers)
+        for row, values in ws.data_rows(max(ws.max_column, validator.width),
+                                        resolved=not snapshot.data_only):
+            validator.check(row, values)
+        report = validator.report(ws.formula_cycles)
+        issues += report.issues
+        rows_checked += report.rows
+    return ValidationReport(issues, rows_checked)
+
+
+def _validate_before_export(snapshot: "WorkbookSnapshot", xlsm_path: str,
+                            log_func=print, sheet_names=SNAPSHOT_SHEETS) -> bool:
+    """Valide les pages exportees ; False si l'export doit etre bloque.
+
+    Au-dela de VALIDATION_LOG_LIMIT problemes, le rapport complet est ecrit
+    dans Validation_<classeur>_<horodatage>.txt du dossier de rapport, s'il
+    est configure (configure_validation).
+    """
+    if _validation_mode == "off":
+        return True
+    with _timed("validate"):
+        report = validate_snapshot(snapshot, sheet_names)
+    return _apply_validation(report, xlsm_path, log_func)
+
+
+def _apply_validation(report: ValidationReport, xlsm_path: str, log_func=print) -> bool:
+    """Journalise un rapport de validation ; False si l'export doit etre bloque."""
+    if not report.issues:
+        return True
+    report.log(log_func)
+    if len(report.issues) > VALIDATION_LOG_LIMIT and _validation_report_dir:
+        stem = os.path.splitext(os.path.basename(xlsm_path))[0]
+        report_path, report_name = _output_path(xlsm_path, _validation_report_dir,
+                                                f"Validation_{stem}", "txt")
+        try:
+            report.write(report_path)
+            log_func(f"  Rapport complet : {report_name}")
+        except OSError as e:
+            log_func(f"  Rapport de validation non ecrit : {e}")
+    if _validation_mode == "block" and report.errors:
+        log_func(f"ERREUR : export bloque : {len(report.errors)} erreur(s) de validation")
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Export incremental (delta) : seules les lignes nouvelles ou modifiees
+# ---------------------------------------------------------------------------
+
+DELTA_STATE_FILE = ".destriimport_empreintes_{kind}_{source}.json"
+DELTA_STATE_VERSION = 2
+# Fichier unique des versions precedentes (toutes les empreintes du dossier),
+# encore lu pour que le premier delta apres mise a jour reste incremental
+DELTA_LEGACY_STATE_FILE = ".destriimport_empreintes.json"
+
+
+class DeltaTracker:
+    """Compare les lignes d'un export a celles de l'export precedent.
+
+    Chaque ligne est identifiee par son Name (un Name en double devient
+    "Name#2", "Name#3"...) et resumee par un SHA-1 de son contenu exporte.
+    Les empreintes sont conservees dans le dossier de sortie, un fichier
+    DELTA_STATE_FILE par classeur source (chemin absolu resolu) et par type
+    d'export : des exports paralleles (lot, interface et CLI) n'ecrivent
+    jamais le meme fichier d'etat.
+    """
+
+    def __init__(self, output_path: str, xlsm_path: str, kind: str):
+        self.directory = os.path.dirname(os.path.abspath(output_path))
+        self.xlsm_path = os.path.realpath(xlsm_path)
+        self.kind = kind
+        source = hashlib.sha1(os.path.normcase(self.xlsm_path).encode("utf-8")).hexdigest()
+        self.state_path = os.path.join(self.directory, DELTA_STATE_FILE.format(
+            kind=kind, source=source[:16]))
+        self.previous = self._load_rows()
+        self.current = {}
+        self.added = []
+        self.modified = []
+        self._occurrences = {}
+
+    def _load_rows(self) -> dict:
+        state = self._read_json(self.state_path)
+        if (isinstance(state, dict) and state.get("version") == DELTA_STATE_VERSION
+                and state.get("source") == self.xlsm_path):
+            return state.get("rows", {})
+        state = self._read_json(os.path.join(self.directory, DELTA_LEGACY_STATE_FILE))
+        if not isinstance(state, dict) or state.get("version") != 1:
+            return {}
+        entry = state.get("exports", {}).get(
+            f"{os.path.basename(self.xlsm_path)}|{self.kind}", {})
+        if entry.get("source") != self.xlsm_path:
+            return {}
+        return entry.get("rows", {})
+
+    @staticmethod
+    def _read_json(path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def changed(self, name: str, content: str) -> bool:
+        """Enregistre la ligne ; vrai si elle est nouvelle ou modifiee."""
+        n = self._occurrences.get(name, 0) + 1
+        self._occurrences[name] = n
+        key = name if n == 1 else f"{name}#{n}"
+        fingerprint = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        self.current[key] = fingerprint
+        previous = self.previous.get(key)
+        if previous is None:
+            self.added.append(key)
+        elif previous != fingerprint:
+            self.modified.append(key)
+        else:
+            return False
+        return True
+
+    def removed(self) -> List[str]:
+        """Lignes presentes a l'export precedent et absentes de celui-ci."""
+        return [key for key in self.previous if key not in self.current]
+
+    def save(self):
+        """Remplace les empreintes de cet export (ecriture atomique, temporaire unique)."""
+        state = {"version": DELTA_STATE_VERSION, "source": self.xlsm_path, "kind": self.kind,
+                 "date": datetime.now().isoformat(timespec="seconds"), "rows": self.current}
+        # Pas _open_output : le fichier d'etat est remplace meme dans un lot
+        # (configure_output(no_clobber=True)) et n'est pas compte dans les mesures
+        tmp_path = os.path.join(self.directory, f".~{os.path.basename(self.state_path)}"
+                                                f".{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, "x", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def _delta_output(xlsm_path: str, output_dir: Optional[str], prefix: str, ext: str,
+                  kind: str, delta: bool):
+    """(chemin, nom, tracker) du fichier d'export ; tracker None hors mode delta."""
+    if not delta:
+        return _output_path(xlsm_path, output_dir, prefix, ext) + (None,)
+    output_path, filename = _output_path(xlsm_path, output_dir, prefix + "_delta", ext)
+    return output_path, filename, DeltaTracker(output_path, xlsm_path, kind)
+
+
+def _finish_delta(tracker: DeltaTracker, output_path: str, log_func=print):
+    """Journal du delta, rapport des lignes supprimees, puis sauvegarde des empreintes."""
+    removed = tracker.removed()
+    log_func(f"  Delta : {len(tracker.added)} nouvelle(s), {len(tracker.modified)} "
+             f"modifiee(s), {len(removed)} supprimee(s) depuis le dernier export")
+    if removed:
+        report_path = os.path.splitext(output_path)[0] + "_supprimes.txt"
+        with _open_output(report_path) as f:
+            f.write("\n".join(removed))
+        log_func(f"  Lignes supprimees : {os.path.basename(report_path)}")
+    tracker.save()
 
 
 # ---------------------------------------------------------------------------
 # EXPORT 1 : TXT Optiplanning (existant)
 # ---------------------------------------------------------------------------
 
-def generate_optiplanning_lines(materials: list) -> list:
-    lines = []
-    for mat in materials:
-        cols = [
-            mat.saw_reference,
-            mat.board_l,
-            mat.board_w,
-            mat.thickness,
-            mat.fiber_material,
-            mat.cost,
-            mat.parametres,
-            mat.ref_fournisseur,
-        ]
-        lines.append("\t".join(cols))
-    return lines
-
-
-def export_optiplanning_txt(xlsm_path: str, output_dir: str = None, log_func=print) -> str:
-    """Export TXT Optiplanning (8 colonnes tab-delimited)."""
-    materials = read_materials_from_xlsm(xlsm_path, log_func)
+def generate_optiplanning_lines(materials) -> list:
+    """Lignes TXT (liste de MaterialSWOOD ou MaterialTable)."""
+    return ["\t".join(cols) for cols in iter_material_columns(
+        materials, "saw_reference", "board_l", "board_w", "thickness",
+        "fiber_material", "cost", "parametres", "ref_fournisseur")]
+
+
+def export_optiplanning_txt(xlsm_path: str, output_dir: str = None, log_func=print,
+                            snapshot: Optional[WorkbookSnapshot] = None,
+                            progress_func=None, delta: bool = False) -> str:
+    """Export TXT Optiplanning (8 colonnes tab-delimited).
+
+    progress_func(fait, total) est appele a chaque ligne ; il peut lever
+    ExportCancelled pour interrompre l'export (idem pour les autres exports).
+    delta=True n'ecrit que les lignes nouvelles ou modifiees depuis l'export
+    precedent (voir DeltaTracker ; idem pour les autres exports).
+    Les lignes sont d'abord validees (voir configure_validation) ; en mode
+    "block", une erreur empeche l'ecriture et l'export retourne "" (idem
+    pour les autres exports).
+    """
+    # Lignes controlees au fil de la lecture (pas de second snapshot), formules
+    # cherchees seulement dans les colonnes ecrites dans le TXT
+    validator = (_SheetValidator("Materials", columns=_TXT_MATERIAL_COLUMNS)
+                 if _validation_mode != "off" else None)
+    materials = read_materials_from_xlsm(xlsm_path, log_func, snapshot=snapshot,
+                                         progress_func=progress_func, validator=validator)
     if not materials:
         log_func("ERREUR : Aucun materiau lu.")
         return ""
+    if validator is not None and not _apply_validation(validator.report(), xlsm_path, log_func):
+        return ""
 
-    lines = generate_optiplanning_lines(materials)
+    output_path, filename, tracker = _delta_output(xlsm_path, output_dir,
+                                                   "Materiaux_a_importer_Optiplanning", "txt",
+                                                   "txt", delta)
+    count = _write_optiplanning_txt(materials, output_path, tracker)
+    _log_optiplanning_summary(materials, filename, count, log_func)
+    if tracker is not None:
+        _finish_delta(tracker, output_path, log_func)
 
-    if output_dir is None:
-        output_dir = os.path.dirname(os.path.abspath(xlsm_path))
+    return output_path
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"Materiaux_a_importer_Optiplanning_{timestamp}.txt"
-    output_path = os.path.join(output_dir, filename)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+def _write_optiplanning_txt(materials, output_path: str,
+                            delta: Optional[DeltaTracker] = None) -> int:
+    """Ecrit le fichier TXT Optiplanning et retourne le nombre de lignes."""
+    with _timed("build"):
+        lines = generate_optiplanning_lines(materials)
+        if delta is not None:
+            lines = [line for (name,), line in zip(iter_material_columns(materials, "name"), lines)
+                     if delta.changed(name, line)]
+        text = "\n".join(lines)
+    with _open_output(output_path) as f:
+        f.write(text)
+    _count("rows_written", len(lines))
+    return len(lines)
 
-    count_5m = sum(1 for m in materials if m.parametres == "Destribois 5m")
-    count_default_cost = sum(1 for m in materials if m.cost == "1.50")
-    count_no_ref = sum(1 for m in materials if not m.ref_fournisseur)
 
+def _log_optiplanning_summary(materials, filename: str, count: int, log_func=print):
+    counts = material_counts(materials)
     log_func(f"Fichier cree : {filename}")
-    log_func(f"  {len(lines)} lignes")
-    log_func(f"  {count_5m} lignes 'Destribois 5m'")
-    log_func(f"  {count_default_cost} lignes cout par defaut (1.50)")
-    if count_no_ref:
-        log_func(f"  {count_no_ref} lignes sans ref fournisseur")
-
-    return output_path
+    log_func(f"  {count} lignes")
+    log_func(f"  {counts['5m']} lignes 'Destribois 5m'")
+    log_func(f"  {counts['default_cost']} lignes cout par defaut (1.50)")
+    if counts["no_ref"]:
+        log_func(f"  {counts['no_ref']} lignes sans ref fournisseur")
 
 
 # ---------------------------------------------------------------------------
 # EXPORT 2 : XML Plaques Nesting (structure identique a Structure.xml)
 # ---------------------------------------------------------------------------
 
-def export_xml_boards_nesting(xlsm_path: str, output_dir: str = None, log_func=print) -> str:
+def export_xml_boards_nesting(xlsm_path: str, output_dir: str = None, log_func=print,
+                              snapshot: Optional[WorkbookSnapshot] = None,
+                              progress_func=None, delta: bool = False,
+                              stable_uuid: bool = True,
+                              settings: Optional["NestingSettings"] = None) -> str:
     """Export XML plaques pour SWOOD Nesting.
 
     Genere le XML en texte brut (meme format que la macro VBA) pour
     une compatibilite maximale avec l'import SWOOD.
     Structure : <SWOODMat> -> <Boards> -> <Board ... />
     Dimensions en mm (identique au fichier de reference Structure_plaques_nesting.xml).
+    LibraryUUID deterministe par defaut (voir _write_boards_nesting).
+    settings : Quantity et dimensions par defaut (NESTING_SETTINGS si None).
     """
-    materials = read_all_materials_from_xlsm(xlsm_path, log_func)
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    materials = read_material_table_from_xlsm(xlsm_path, log_func, snapshot=snapshot,
+                                              progress_func=progress_func)
     if not materials:
         log_func("ERREUR : Aucun materiau lu.")
         return ""
 
+    if not _validate_before_export(snapshot, xlsm_path, log_func, ("Materials",)):
+        return ""
+
     log_func(f"Generation XML Plaques Nesting...")
 
-    # Lire l'entete XML depuis le XLSM (identique a la macro VBA)
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=False)
-    ws = wb["Materials"]
-    xml_line1 = str(ws.cell(row=1, column=1).value or '<?xml version="1.0" encoding="utf-8"?>')
-    xml_line2 = str(ws.cell(row=2, column=1).value or "")
-    wb.close()
+    # Entete XML lue depuis le XLSM (identique a la macro VBA)
+    ws = snapshot.sheet("Materials")
+    output_path, filename, tracker = _delta_output(xlsm_path, output_dir, "Plaques_Nesting",
+                                                   "xml", "nesting", delta)
+    count = _write_boards_nesting(materials, ws.xml_line1, ws.xml_line2, output_path,
+                                  progress_func, tracker, stable_uuid, settings)
+    _log_nesting_summary(materials, filename, count, log_func)
+    if tracker is not None:
+        _finish_delta(tracker, output_path, log_func)
 
-    # Construction du XML en texte brut (meme format que la macro VBA)
-    txt = xml_line1 + "\r\n" + xml_line2
-    txt += "\r\n\t<Boards>"
+    return output_path
 
-    count = 0
-    for idx, mat in enumerate(materials, start=1):
-        count += 1
 
-        # Dimensions XLSM en mm -> conversion en metres pour SWOOD (SWOOD x1000 a l'import)
-        try:
-            length_mm = float(mat.board_l) if mat.board_l else 2800.0
-        except (ValueError, TypeError):
-            length_mm = 2800.0
-        try:
-            width_mm = float(mat.board_w) if mat.board_w else 2070.0
-        except (ValueError, TypeError):
-            width_mm = 2070.0
-        try:
-            thick_mm = float(mat.thickness) if mat.thickness else 19.0
-        except (ValueError, TypeError):
-            thick_mm = 19.0
-        length_val = length_mm / 1000.0
-        width_val = width_mm / 1000.0
-        thick_val = thick_mm / 1000.0
+# Espace de noms des LibraryUUID deterministes (UUIDv5) des plaques Nesting
+NESTING_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "nesting.destribois.fr")
+
+
+def board_library_uuid(name: str, ref_fournisseur: str = "", occurrence: int = 1) -> str:
+    """LibraryUUID stable d'une plaque : UUIDv5 de Name + ref fournisseur.
+
+    Une plaque inchangee garde le meme UUID d'un export a l'autre ; occurrence
+    distingue les plaques en double (meme Name et meme ref) dans un fichier.
+    """
+    key = f"{name}\t{ref_fournisseur}"
+    if occurrence > 1:
+        key += f"\t{occurrence}"
+    return str(uuid.uuid5(NESTING_UUID_NAMESPACE, key))
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class NestingSettings:
+    """Valeurs fixes des plaques Nesting : Quantity et dimensions par defaut (mm)
+    utilisees si la cellule est vide ou non numerique."""
+    quantity: int = 10
+    length_mm: float = 2800.0
+    width_mm: float = 2070.0
+    thickness_mm: float = 19.0
+
 
-        # GrainDirection
-        grain = "Horizontal" if mat.fiber_material == "1" else "None"
+NESTING_SETTINGS = NestingSettings()
 
+
+def _board_template(settings: NestingSettings) -> str:
+    """Gabarit %-format d'un <Board ... /> : attributs constants deja joints.
+
+    Champs : Name, Description, Path, Length, Width, Thickness (m, %g),
+    GrainDirection, Cost (%.2f), Reference, Supplier, SupplierReference,
+    LibraryUUID, ID, Materials ; les textes sont passes echappes (_xml_attr).
+    """
+    quantity = str(settings.quantity).replace("%", "%%")
+    return ('\n\t\t<Board Name="%s" Description="%s" Path="%s" BoardType="Panel"'
+            ' Length="%g" Width="%g" Thickness="%g" GrainDirection="%s"'
+            ' Quantity="' + quantity + '" Cost="%.2f" MaterialID="0"'
+            ' Reference="%s" Supplier="%s" SupplierReference="%s"'
+            ' NestingCorner="Lower_Left" NestingDirection="X" NestingUniformCollar="0"'
+            ' DefaultNestPriority="1" TopMaterial="" TopGrainAngle="NaN"'
+            ' BottomMaterial="" BottomGrainAngle="NaN" CanFlipTopBottom="false"'
+            ' LibraryUUID="%s" ID="%d" ForBoardEstimation="true" Materials="%s" />')
+
+
+def _write_boards_nesting(materials, xml_line1: str, xml_line2: str,
+                          output_path: str, progress_func=None,
+                          delta: Optional[DeltaTracker] = None,
+                          stable_uuid: bool = True,
+                          settings: Optional[NestingSettings] = None) -> int:
+    """Construit et ecrit le XML <Boards> ; retourne le nombre de plaques.
+
+    materials : MaterialTable (parcourue colonne par colonne) ou liste de MaterialSWOOD.
+    Avec delta, seules les plaques nouvelles ou modifiees sont ecrites (ID
+    numerotes dans le fichier delta).
+    stable_uuid=True : LibraryUUID deterministe (board_library_uuid), un
+    re-export de plaques inchangees est identique octet pour octet ;
+    False : uuid4 aleatoire a chaque export (ancien comportement).
+    Les dimensions et couts sont calcules colonne par colonne avant la
+    boucle (board_dimensions), et chaque plaque est un seul formatage du
+    gabarit _board_template.
+    """
+    settings = settings or NESTING_SETTINGS
+    with _timed("build"):
+        # Meme format texte brut que la macro VBA
+        parts = [xml_line1 + "\n" + xml_line2 + "\n\t<Boards>"]
+        add = parts.append
+        template = _board_template(settings)
+
+        # Dimensions XLSM en mm -> metres pour SWOOD (SWOOD x1000 a l'import),
         # Cost = surface m2 x prix/m2
-        try:
-            cost_m2 = float(mat.cost) if mat.cost else 0.0
-        except (ValueError, TypeError):
-            cost_m2 = 0.0
-        cost_plaque = length_val * width_val * cost_m2
-
-        # Materials = SawReference ou Name
-        materials_val = mat.saw_reference if mat.saw_reference else mat.name
-
-        # Construction du <Board ... /> en texte brut (self-closing)
-        txt += "\r\n\t\t<Board"
-        txt += f' Name="{mat.name}"'
-        txt += f' Description="{mat.description}"'
-        txt += f' Path="{mat.path}"'
-        txt += f' BoardType="Panel"'
-        txt += f' Length="{length_val:g}"'
-        txt += f' Width="{width_val:g}"'
-        txt += f' Thickness="{thick_val:g}"'
-        txt += f' GrainDirection="{grain}"'
-        txt += f' Quantity="10"'
-        txt += f' Cost="{cost_plaque:.2f}"'
-        txt += f' MaterialID="0"'
-        txt += f' Reference="{mat.ref_fournisseur}"'
-        txt += f' Supplier="{mat.fournisseur}"'
-        txt += f' SupplierReference="{mat.ref_fournisseur}"'
-        txt += f' NestingCorner="Lower_Left"'
-        txt += f' NestingDirection="X"'
-        txt += f' NestingUniformCollar="0"'
-        txt += f' DefaultNestPriority="1"'
-        txt += f' TopMaterial=""'
-        txt += f' TopGrainAngle="NaN"'
-        txt += f' BottomMaterial=""'
-        txt += f' BottomGrainAngle="NaN"'
-        txt += f' CanFlipTopBottom="false"'
-        txt += f' LibraryUUID="{uuid.uuid4()}"'
-        txt += f' ID="{idx}"'
-        txt += f' ForBoardEstimation="true"'
-        txt += f' Materials="{materials_val}"'
-        txt += " />"
-
-    txt += "\r\n\t</Boards>"
-    txt += "\r\n</SWOODMat>"
-
-    # Ecriture du fichier
-    if output_dir is None:
-        output_dir = os.path.dirname(os.path.abspath(xlsm_path))
+        lengths, widths, thicknesses, costs = board_dimensions(materials, settings)
+        # Textes echappes colonne par colonne (colonne propre : aucun appel par valeur)
+        texts = zip(*(_xml_attr_column(material_column(materials, name)) for name in (
+            "name", "description", "path", "saw_reference", "ref_fournisseur", "fournisseur")))
+
+        count = 0
+        total = len(materials)
+        occurrences = {}
+        rows = iter_material_columns(materials, "name", "description", "path", "board_l",
+                                     "board_w", "thickness", "fiber_material", "cost",
+                                     "saw_reference", "ref_fournisseur", "fournisseur")
+        for idx, (row, text, length, width, thick, cost) in enumerate(
+                zip(rows, texts, lengths, widths, thicknesses, costs), start=1):
+            if progress_func is not None:
+                progress_func(idx, total)
+            name = row[0]
+            ref_fournisseur = row[9]
+            # Occurrences comptees avant le filtre delta : meme UUID que l'export complet
+            occurrence = occurrences.get((name, ref_fournisseur), 0) + 1
+            occurrences[name, ref_fournisseur] = occurrence
+            if delta is not None and not delta.changed(name, "\t".join(row)):
+                continue
+            count += 1
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"Plaques_Nesting_{timestamp}.xml"
-    output_path = os.path.join(output_dir, filename)
+            if stable_uuid:
+                library_uuid = board_library_uuid(name, ref_fournisseur, occurrence)
+            else:
+                library_uuid = str(uuid.uuid4())
+
+            name_xml, description, path, saw_reference, reference, supplier = text
+            add(template % (
+                name_xml, description, path, length, width, thick,
+                "Horizontal" if row[6] == "1" else "None",  # GrainDirection
+                cost, reference, supplier, reference, library_uuid, count,
+                saw_reference or name_xml,  # Materials = SawReference ou Name
+            ))
+
+        add("\n\t</Boards>\n</SWOODMat>")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(txt)
+    with _open_output(output_path) as f:
+        f.writelines(parts)
+    _count("rows_written", count)
 
+    return count
+
+
+def _log_nesting_summary(materials, filename: str, count: int, log_func=print):
     log_func(f"Fichier cree : {filename}")
     log_func(f"  {count} plaques exportees")
-    count_grain = sum(1 for m in materials if m.fiber_material == "1")
-    log_func(f"  {count_grain} plaques avec grain horizontal")
-
-    return output_path
+    log_func(f"  {material_counts(materials)['grain']} plaques avec grain horizontal")
 
 
 # ---------------------------------------------------------------------------
@@ -584,6 +2677,7 @@ def export_xml_boards_nesting(xlsm_path: str, output_dir: str = None, log_func=p
 #   "/Layers"    -> ferme le <Layer> puis </Layers>
 # ---------------------------------------------------------------------------
 
+@_normaliser
 def _format_cell_value(val) -> str:
     """Formate une valeur de cellule comme la macro VBA :
     - Remplace les virgules par des points
@@ -598,33 +2692,148 @@ def _format_cell_value(val) -> str:
     return s
 
 
-def _export_vba_xml_sheet(xlsm_path: str, sheet_name: str, output_dir: str = None,
-                          output_prefix: str = "Export", log_func=print) -> str:
-    """Reproduit exactement la logique de la macro VBA SaveTextToFile pour une sheet.
+@_normaliser
+def _xml_cell_value(val) -> str:
+    """_format_cell_value echappe pour une valeur d'attribut XML."""
+    return _xml_attr(_format_cell_value(val))
+
+
+# Operations du plan de colonnes compile (voir _compile_vba_column_plan)
+_OP_ATTR = 0            # ""/"Layer" : attribut ajoute au noeud courant
+_OP_PROPERTIES = 1      # "Properties" : ouvre <Properties> + premiere <Property>
+_OP_PROPERTY = 2        # "Property" : <Property> (ouvre <Properties> si besoin)
+_OP_END_PROPERTIES = 3  # "/Properties" : derniere <Property> puis </Properties>
+_OP_LAYERS = 4          # "Layers" : ouvre <Layers> + premier <Layer
+_OP_END_LAYER = 5       # "/Layer" : dernier attribut puis ferme le <Layer ... />
+_OP_END_LAYERS = 6      # "/Layers" : ferme le <Layer ... /> puis </Layers>
+
+
+def _compile_vba_column_plan(tags: List[str], headers: List[str]) -> List[tuple]:
+    """Compile les tags (row 3) et headers (row 4) en un plan d'emission.
 
-    Lit les cellules A1, A2 (entete XML), row 3 (tags), row 4 (headers),
-    puis parcourt les donnees (row 5+) en construisant le XML exactement comme
-    le fait la macro VBA du XLSM.
+    Retourne une liste de (operation, index_colonne, prefixe) ou le prefixe
+    (ex: ' Name="' ou '<Property Name="BOARDL" Value="') est deja construit.
+    Le look-back sur le tag precedent ("Layer" apres "/Layer" = nouveau
+    <Layer>) est resolu ici, une fois par page. Les tags inconnus sont
+    ignores, comme dans la macro.
     """
-    log_func(f"Lecture de : {os.path.basename(xlsm_path)} ({sheet_name})")
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=False)
-    ws = wb[sheet_name]
+    plan = []
+    for j, tag in enumerate(tags):
+        header = headers[j]
+        prev_tag = tags[j - 1] if j > 0 else ""
+        if tag == "":
+            plan.append((_OP_ATTR, j, " " + header + "=\""))
+        elif tag == "Layer":
+            if prev_tag == "/Layer":
+                plan.append((_OP_ATTR, j, "\n\t\t\t\t<Layer " + header + "=\""))
+            else:
+                plan.append((_OP_ATTR, j, " " + header + "=\""))
+        elif tag in ("Properties", "Property", "/Properties"):
+            op = {"Properties": _OP_PROPERTIES, "Property": _OP_PROPERTY,
+                  "/Properties": _OP_END_PROPERTIES}[tag]
+            plan.append((op, j, "\n\t\t\t\t<Property Name=\"" + _xml_attr(header)
+                         + "\" Value=\""))
+        elif tag == "Layers":
+            plan.append((_OP_LAYERS, j, "\n\t\t\t<Layers>\n\t\t\t\t<Layer " + header + "=\""))
+        elif tag == "/Layer":
+            plan.append((_OP_END_LAYER, j, " " + header + "=\""))
+        elif tag == "/Layers":
+            plan.append((_OP_END_LAYERS, j, " " + header + "=\""))
+    return plan
+
+
+def _render_vba_xml_object(plan: List[tuple], obj_alias: str, values) -> str:
+    """Construit le XML d'un objet (une ligne) en executant le plan compile.
+
+    Reproduit la machine a etats de la macro VBA : les balises de fermeture
+    sont toujours traitees, les autres colonnes sont ignorees si vides.
+    Contrairement a la macro, les valeurs sont echappees (_xml_cell_value).
+    """
+    parts = ["\n\t\t<" + obj_alias]
+    add = parts.append
+    needs_close_tag = False  # True si on a ouvert un sous-noeud (Layers/Properties)
+    in_properties = False  # True si on est dans un bloc <Properties>
+    in_layers = False  # True si on est dans un bloc <Layers>
+
+    for op, j, prefix in plan:
+        val = values[j]
+        cur_val = "" if val is None else _xml_cell_value(val)
+
+        if op == _OP_ATTR:
+            if cur_val != "":
+                add(prefix + cur_val + "\"")
+
+        elif op == _OP_END_PROPERTIES:
+            if cur_val != "":
+                add(prefix + cur_val + "\" />")
+            if in_properties:
+                add("\n\t\t\t</Properties>")
+                in_properties = False
+
+        elif op == _OP_END_LAYERS:
+            if in_layers:
+                if cur_val != "":
+                    add(prefix + cur_val + "\" />")
+                add("\n\t\t\t</Layers>")
+                in_layers = False
+
+        elif op == _OP_END_LAYER:
+            if in_layers:
+                if cur_val != "":
+                    add(prefix + cur_val + "\"")
+                add(" />")
+
+        elif cur_val == "":
+            continue
 
-    lastrow = ws.max_row
-    lastcol = ws.max_column
+        elif op == _OP_PROPERTY:
+            # Si Properties n'a pas ete ouvert (colonne Properties/BOARDL vide),
+            # il faut l'ouvrir maintenant
+            if not in_properties:
+                if not needs_close_tag:
+                    add(">")
+                    needs_close_tag = True
+                add("\n\t\t\t<Properties>")
+                in_properties = True
+            add(prefix + cur_val + "\" />")
+
+        elif op == _OP_PROPERTIES:
+            # Ouvrir le noeud objet (>) et commencer un bloc Properties
+            if not needs_close_tag:
+                add(">")
+                needs_close_tag = True
+            add("\n\t\t\t<Properties>" + prefix + cur_val + "\" />")
+            in_properties = True
+
+        elif op == _OP_LAYERS:
+            # Ouvrir le noeud objet (>) et commencer un bloc Layers
+            if not needs_close_tag:
+                add(">")
+                needs_close_tag = True
+            add(prefix + cur_val + "\"")
+            in_layers = True
+
+    # Fermeture du noeud objet
+    if needs_close_tag:
+        # Le noeud a des sous-elements (Properties/Layers) -> fermeture explicite
+        add("\n\t\t</" + obj_alias + ">")
+    else:
+        # Le noeud n'a que des attributs -> self-closing />
+        add(" />")
 
-    # Lire l'entete XML depuis A1 et A2
-    xml_line1 = str(ws.cell(row=1, column=1).value or "<?xml version=\"1.0\" encoding=\"utf-8\"?>")
-    xml_line2 = str(ws.cell(row=2, column=1).value or "")
+    return "".join(parts)
 
-    # Lire tags (row 3) et headers (row 4)
-    tags = []
-    headers = []
-    for j in range(1, lastcol + 1):
-        tag = ws.cell(row=3, column=j).value
-        tags.append(str(tag).strip() if tag else "")
-        header = ws.cell(row=4, column=j).value
-        headers.append(str(header).strip() if header else "")
+
+def _iter_vba_xml_objects(ws: SheetData, delta: Optional[DeltaTracker] = None):
+    """Genere le XML de chaque objet (une ligne de donnees = un chunk).
+
+    Reproduit exactement la logique de la macro VBA SaveTextToFile :
+    row 3 (tags) et row 4 (headers) sont compiles une fois en plan
+    d'emission, puis chaque ligne 5+ est rendue en <Material ...> ou
+    <EdgeBand ...>. Avec delta, les objets inchanges sont omis (cle
+    "Page/Name").
+    """
+    sheet_name = ws.name
 
     # Alias : Materials -> Material, EdgeBands -> EdgeBand
     if sheet_name == "Materials":
@@ -634,182 +2843,114 @@ def _export_vba_xml_sheet(xlsm_path: str, sheet_name: str, output_dir: str = Non
     else:
         obj_alias = sheet_name.rstrip("s")
 
-    # Construction du texte XML (reproduction fidele de la macro VBA)
-    txt = xml_line1 + "\r\n" + xml_line2
-    txt += "\r\n\t<" + sheet_name + ">"
-
-    # Helper pour resoudre les formules simples de type =COL_LETTRE+LIGNE
-    # (ex: =AT5 -> lire la valeur de la colonne AT ligne 5)
-    import re as _re
-    def _resolve_cell_value(ws, row, col):
-        """Lit une cellule et resout les formules simples (=XX123)."""
-        val = ws.cell(row=row, column=col).value
-        if isinstance(val, str) and val.startswith("="):
-            # Formule simple de type =AT5, =A5, =B12, etc.
-            m = _re.match(r"^=([A-Z]{1,3})(\d+)$", val)
-            if m:
-                ref_col_str = m.group(1)
-                ref_row = int(m.group(2))
-                ref_col = 0
-                for ch in ref_col_str:
-                    ref_col = ref_col * 26 + (ord(ch) - ord('A') + 1)
-                ref_val = ws.cell(row=ref_row, column=ref_col).value
-                # Verifier que la ref n'est pas aussi une formule (eviter boucle)
-                if isinstance(ref_val, str) and ref_val.startswith("="):
-                    return val  # retourner la formule telle quelle
-                return ref_val
-        return val
+    plan = _compile_vba_column_plan(ws.tags, ws.headers)
 
-    count = 0
-    for i in range(5, lastrow + 1):
+    for i, values in ws.data_rows(ws.max_column, resolved=True):
         # Verifier que la ligne a un nom (col 1)
-        name_val = _resolve_cell_value(ws, i, 1)
+        name_val = values[0]
         if not name_val or str(name_val).strip() == "":
             continue
-        count += 1
-
-        # Debut du noeud objet
-        obj_txt = "\r\n\t\t<" + obj_alias
-        needs_close_tag = False  # True si on a ouvert un sous-noeud (Layers/Properties)
-        in_properties = False  # True si on est dans un bloc <Properties>
-        in_layers = False  # True si on est dans un bloc <Layers>
-
-        for j in range(lastcol):
-            tag = tags[j]
-            header = headers[j]
-            raw_val = _resolve_cell_value(ws, i, j + 1)
-            cur_val = _format_cell_value(raw_val)
-
-            # Pour les balises de fermeture, on doit toujours les traiter
-            # meme si la valeur est vide
-            if tag == "/Properties":
-                if cur_val != "":
-                    obj_txt += "\r\n\t\t\t\t<Property Name=\"" + header + "\" Value=\"" + cur_val + "\" />"
-                if in_properties:
-                    obj_txt += "\r\n\t\t\t</Properties>"
-                    in_properties = False
-                continue
-
-            if tag == "/Layers":
-                if in_layers:
-                    if cur_val != "":
-                        obj_txt += " " + header + "=\"" + cur_val + "\" />"
-                    obj_txt += "\r\n\t\t\t</Layers>"
-                    in_layers = False
-                continue
-
-            if tag == "/Layer":
-                if in_layers:
-                    if cur_val != "":
-                        obj_txt += " " + header + "=\"" + cur_val + "\""
-                    obj_txt += " />"
-                continue
-
-            if cur_val == "":
-                continue
-
-            if tag == "":
-                # Attribut simple
-                obj_txt += " " + header + "=\"" + cur_val + "\""
+        chunk = _render_vba_xml_object(plan, obj_alias, values)
+        # Empreinte du texte tel qu'ecrit (CRLF) : compatible avec les exports precedents
+        if delta is not None and not delta.changed(f"{sheet_name}/{str(name_val).strip()}",
+                                                   chunk.replace("\n", "\r\n")):
+            continue
+        yield chunk
 
-            elif tag == "Properties":
-                # Ouvrir le noeud objet (>) et commencer un bloc Properties
-                if not needs_close_tag:
-                    obj_txt += ">"
-                    needs_close_tag = True
-                obj_txt += "\r\n\t\t\t<Properties>"
-                obj_txt += "\r\n\t\t\t\t<Property Name=\"" + header + "\" Value=\"" + cur_val + "\" />"
-                in_properties = True
 
-            elif tag == "Property":
-                # Si Properties n'a pas ete ouvert (colonne Properties/BOARDL vide),
-                # il faut l'ouvrir maintenant
-                if not in_properties:
-                    if not needs_close_tag:
-                        obj_txt += ">"
-                        needs_close_tag = True
-                    obj_txt += "\r\n\t\t\t<Properties>"
-                    in_properties = True
-                obj_txt += "\r\n\t\t\t\t<Property Name=\"" + header + "\" Value=\"" + cur_val + "\" />"
-
-            elif tag == "Layers":
-                # Ouvrir le noeud objet (>) et commencer un bloc Layers
-                if not needs_close_tag:
-                    obj_txt += ">"
-                    needs_close_tag = True
-                obj_txt += "\r\n\t\t\t<Layers>"
-                obj_txt += "\r\n\t\t\t\t<Layer " + header + "=\"" + cur_val + "\""
-                in_layers = True
-
-            elif tag == "Layer":
-                # Verifier si le tag precedent etait /Layer -> nouveau Layer
-                prev_tag = tags[j - 1] if j > 0 else ""
-                if prev_tag == "/Layer":
-                    obj_txt += "\r\n\t\t\t\t<Layer " + header + "=\"" + cur_val + "\""
-                else:
-                    obj_txt += " " + header + "=\"" + cur_val + "\""
+def _export_vba_xml_sheet(xlsm_path: str, sheet_name: str, out, log_func=print,
+                          snapshot: Optional[WorkbookSnapshot] = None,
+                          progress_func=None,
+                          delta: Optional[DeltaTracker] = None) -> int:
+    """Ecrit le bloc <Sheet>...</Sheet> d'une page dans `out` (macro VBA SaveTextToFile).
 
-        # Fermeture du noeud objet
-        if needs_close_tag:
-            # Le noeud a des sous-elements (Properties/Layers) -> fermeture explicite
-            obj_txt += "\r\n\t\t</" + obj_alias + ">"
-        else:
-            # Le noeud n'a que des attributs -> self-closing />
-            obj_txt += " />"
+    `out` est tout objet avec une methode write() : fichier ouvert ou io.StringIO.
+    Les objets sont ecrits au fil de l'eau, sans construire le texte complet
+    en memoire. Le bloc commence par "\t<Sheet>" (sans retour a la ligne,
+    comme l'assemblage de la macro) et se termine par "\n\t</Sheet>".
+    Retourne le nombre d'objets ecrits.
+    """
+    log_func(f"Lecture de : {os.path.basename(xlsm_path)} ({sheet_name})")
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    ws = snapshot.sheet(sheet_name)
+    count = _write_vba_xml_block(out, ws, progress_func, delta)
+    _log_formula_cycles(ws, log_func)
 
-        txt += obj_txt
+    return count
 
-    txt += "\r\n\t</" + sheet_name + ">"
-    wb.close()
 
-    return txt, count
+def _write_vba_xml_block(out, ws: SheetData, progress_func=None,
+                         delta: Optional[DeltaTracker] = None) -> int:
+    """Ecrit "\t<Sheet>", les objets de la page puis "\n\t</Sheet>" dans `out`."""
+    write = out.write
+    total = ws.max_row - 4
+    count = 0
+    with _timed("build"):
+        write("\t<" + ws.name + ">")
+        for chunk in _iter_vba_xml_objects(ws, delta):
+            write(chunk)
+            count += 1
+            if progress_func is not None:
+                progress_func(count, total)
+        write("\n\t</" + ws.name + ">")
+    _count("rows_written", count)
+    return count
+
+
+def _write_vba_xml_file(output_path: str, sheets: List[SheetData], progress_func=None) -> List[int]:
+    """Ecrit un fichier SWOOD complet (entete de la 1ere page + blocs des pages).
+
+    Retourne le nombre d'objets ecrits pour chaque page.
+    """
+    with _open_output(output_path) as f:
+        f.write(sheets[0].xml_line1 + "\n" + sheets[0].xml_line2)
+        counts = [_write_vba_xml_block(f, ws, progress_func) for ws in sheets]
+        f.write("\n</SWOODMat>")
+    return counts
 
 
-def export_xml_materials(xlsm_path: str, output_dir: str = None, log_func=print) -> str:
+def export_xml_materials(xlsm_path: str, output_dir: str = None, log_func=print,
+                         snapshot: Optional[WorkbookSnapshot] = None,
+                         progress_func=None, delta: bool = False) -> str:
     """Export XML materiaux complet pour SWOOD.
 
     Reproduit exactement la macro VBA du XLSM en parcourant les 2 sheets
     (Materials + EdgeBands) et en utilisant les tags row 3 / headers row 4
     pour construire la structure XML identique.
     """
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=False)
-    ws = wb["Materials"]
-    xml_line1 = str(ws.cell(row=1, column=1).value or "<?xml version=\"1.0\" encoding=\"utf-8\"?>")
-    xml_line2 = str(ws.cell(row=2, column=1).value or "")
-    wb.close()
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    ws = snapshot.sheet("Materials")
+    xml_line1 = ws.xml_line1
+    xml_line2 = ws.xml_line2
+    if not _validate_before_export(snapshot, xlsm_path, log_func):
+        return ""
 
     log_func(f"Generation XML SWOOD Materiaux (reproduction macro VBA)...")
 
-    # Construire le XML pour Materials
-    mat_txt, mat_count = _export_vba_xml_sheet(xlsm_path, "Materials", log_func=log_func)
-    log_func(f"  {mat_count} materiaux lus")
-
-    # Construire le XML pour EdgeBands
-    eb_txt, eb_count = _export_vba_xml_sheet(xlsm_path, "EdgeBands", log_func=log_func)
-    log_func(f"  {eb_count} chants lus")
+    output_path, filename, tracker = _delta_output(xlsm_path, output_dir,
+                                                   "Import_Swood_Materiaux", "xml",
+                                                   "materials", delta)
 
-    # Assembler le fichier final : entete + Materials + EdgeBands + fermeture
+    # Fichier final : entete + Materials + EdgeBands + fermeture
     # La macro VBA concatene les 2 sheets dans le meme fichier
-    full_xml = xml_line1 + "\r\n" + xml_line2
-    # Extraire le contenu apres l'entete (a partir de \r\n\t<Materials>)
-    mat_body = mat_txt.split("\r\n", 2)[2] if "\r\n" in mat_txt else ""
-    eb_body = eb_txt.split("\r\n", 2)[2] if "\r\n" in eb_txt else ""
-    full_xml += mat_body + eb_body
-    full_xml += "\r\n</SWOODMat>"
-
-    # Ecriture du fichier
-    if output_dir is None:
-        output_dir = os.path.dirname(os.path.abspath(xlsm_path))
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"Import_Swood_Materiaux_{timestamp}.xml"
-    output_path = os.path.join(output_dir, filename)
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(full_xml)
+    with _open_output(output_path) as f:
+        f.write(xml_line1 + "\n" + xml_line2)
+        mat_count = _export_vba_xml_sheet(xlsm_path, "Materials", f, log_func=log_func,
+                                          snapshot=snapshot, progress_func=progress_func,
+                                          delta=tracker)
+        log_func(f"  {mat_count} materiaux lus")
+        eb_count = _export_vba_xml_sheet(xlsm_path, "EdgeBands", f, log_func=log_func,
+                                         snapshot=snapshot, progress_func=progress_func,
+                                         delta=tracker)
+        log_func(f"  {eb_count} chants lus")
+        f.write("\n</SWOODMat>")
 
     log_func(f"Fichier cree : {filename}")
     log_func(f"  Total : {mat_count} materiaux + {eb_count} chants")
+    if tracker is not None:
+        _finish_delta(tracker, output_path, log_func)
 
     return output_path
 
@@ -818,46 +2959,189 @@ def export_xml_materials(xlsm_path: str, output_dir: str = None, log_func=print)
 # EXPORT 4 : XML Chants / EdgeBands seuls
 # ---------------------------------------------------------------------------
 
-def export_xml_edgebands(xlsm_path: str, output_dir: str = None, log_func=print) -> str:
+def export_xml_edgebands(xlsm_path: str, output_dir: str = None, log_func=print,
+                         snapshot: Optional[WorkbookSnapshot] = None,
+                         progress_func=None, delta: bool = False) -> str:
     """Export XML chants seuls pour SWOOD.
 
     Reproduit la macro VBA du XLSM uniquement pour la sheet EdgeBands.
     """
-    wb = openpyxl.load_workbook(xlsm_path, keep_vba=True, data_only=True)
-    ws = wb["EdgeBands"]
-    xml_line1 = str(ws.cell(row=1, column=1).value or "<?xml version=\"1.0\" encoding=\"utf-8\"?>")
-    xml_line2 = str(ws.cell(row=2, column=1).value or "")
-    wb.close()
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    ws = snapshot.sheet("EdgeBands")
+    xml_line1 = ws.xml_line1
+    xml_line2 = ws.xml_line2
+    if not _validate_before_export(snapshot, xlsm_path, log_func, ("EdgeBands",)):
+        return ""
 
     log_func(f"Generation XML Chants (EdgeBands)...")
 
-    eb_txt, eb_count = _export_vba_xml_sheet(xlsm_path, "EdgeBands", log_func=log_func)
-    log_func(f"  {eb_count} chants lus")
+    output_path, filename, tracker = _delta_output(xlsm_path, output_dir,
+                                                   "Import_Swood_Chants", "xml",
+                                                   "edgebands", delta)
 
-    # Assembler le fichier
-    eb_body = eb_txt.split("\r\n", 2)[2] if "\r\n" in eb_txt else ""
-    full_xml = xml_line1 + "\r\n" + xml_line2 + eb_body + "\r\n</SWOODMat>"
+    with _open_output(output_path) as f:
+        f.write(xml_line1 + "\n" + xml_line2)
+        eb_count = _export_vba_xml_sheet(xlsm_path, "EdgeBands", f, log_func=log_func,
+                                         snapshot=snapshot, progress_func=progress_func,
+                                         delta=tracker)
+        log_func(f"  {eb_count} chants lus")
+        f.write("\n</SWOODMat>")
 
-    # Ecriture du fichier
-    if output_dir is None:
-        output_dir = os.path.dirname(os.path.abspath(xlsm_path))
+    log_func(f"Fichier cree : {filename}")
+    if tracker is not None:
+        _finish_delta(tracker, output_path, log_func)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"Import_Swood_Chants_{timestamp}.xml"
-    output_path = os.path.join(output_dir, filename)
+    return output_path
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(full_xml)
 
-    log_func(f"Fichier cree : {filename}")
+# ---------------------------------------------------------------------------
+# EXPORT COMPLET : les 4 fichiers depuis une seule lecture du XLSM
+# ---------------------------------------------------------------------------
 
-    return output_path
+def _split_progress(progress_func, jobs):
+    """Repartit une progression globale entre plusieurs taches paralleles.
+
+    Retourne {tache: callback(fait, total)} ; chaque callback met a jour la
+    part de sa tache et rappelle progress_func avec l'avancement cumule.
+    """
+    if progress_func is None:
+        return dict.fromkeys(jobs)
+    lock = threading.Lock()
+    fractions = dict.fromkeys(jobs, 0.0)
+
+    def make(job):
+        def report(done, total):
+            with lock:
+                fractions[job] = min(done / total, 1.0) if total > 0 else 0.0
+                progress_func(int(sum(fractions.values()) * 1000), len(jobs) * 1000)
+        return report
+    return {job: make(job) for job in jobs}
+
+
+def export_all(xlsm_path: str, output_dir: str = None, log_func=print,
+               snapshot: Optional[WorkbookSnapshot] = None,
+               progress_func=None, max_workers: int = 4,
+               stable_uuid: bool = True) -> dict:
+    """Genere les 4 exports (TXT, Nesting, Materiaux, Chants) en une seule lecture.
+
+    Le XLSM est lu une fois (snapshot en mode formules), les donnees sont
+    partagees et les 4 fichiers sont ecrits en parallele (threads).
+    Retourne un manifeste :
+        {"source": ..., "outputs": {"txt": {"path": ..., "rows": ...}, ...}}
+    Si un export echoue ou est annule, les fichiers deja ecrits sont supprimes.
+    Validation bloquante en echec : aucun fichier, "outputs" vide.
+    """
+    log_func(f"Lecture unique de : {os.path.basename(xlsm_path)}")
+    if snapshot is None:
+        snapshot = load_snapshot(xlsm_path, log_func=log_func, progress_func=progress_func)
+    mat_ws = snapshot.sheet("Materials")
+    eb_ws = snapshot.sheet("EdgeBands")
+    # Resolution des formules ici, avant de partager les grilles entre threads
+    for ws in (mat_ws, eb_ws):
+        ws.resolved_rows()
+        _log_formula_cycles(ws, log_func)
+    if not _validate_before_export(snapshot, xlsm_path, log_func):
+        return {"source": os.path.abspath(xlsm_path), "outputs": {}}
+
+    quiet = lambda msg: None
+    materials_txt = read_materials_from_xlsm(xlsm_path, quiet, snapshot=snapshot)
+    materials_all = read_material_table_from_xlsm(xlsm_path, quiet, snapshot=snapshot)
+    log_func(f"{len(materials_all)} materiaux lus")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    paths = {
+        "txt": _output_path(xlsm_path, output_dir, "Materiaux_a_importer_Optiplanning",
+                            "txt", timestamp),
+        "nesting": _output_path(xlsm_path, output_dir, "Plaques_Nesting", "xml", timestamp),
+        "materials": _output_path(xlsm_path, output_dir, "Import_Swood_Materiaux", "xml",
+                                  timestamp),
+        "edgebands": _output_path(xlsm_path, output_dir, "Import_Swood_Chants", "xml",
+                                  timestamp),
+    }
+    jobs = {
+        "materials": lambda progress: _write_vba_xml_file(
+            paths["materials"][0], [mat_ws, eb_ws], progress),
+        "edgebands": lambda progress: _write_vba_xml_file(
+            paths["edgebands"][0], [eb_ws], progress),
+    }
+    if materials_all:
+        jobs["txt"] = lambda progress: [_write_optiplanning_txt(materials_txt, paths["txt"][0])]
+        jobs["nesting"] = lambda progress: [_write_boards_nesting(
+            materials_all, mat_ws.xml_line1, mat_ws.xml_line2, paths["nesting"][0], progress,
+            stable_uuid=stable_uuid)]
+    else:
+        log_func("ERREUR : Aucun materiau lu (exports TXT et Nesting ignores).")
+
+    log_func(f"Generation de {len(jobs)} exports en parallele...")
+    progress = _split_progress(progress_func, list(jobs))
+
+    def run(job):
+        counts = jobs[job](progress[job])
+        if progress[job] is not None:
+            progress[job](1, 1)
+        return counts
+
+    results = {}
+    error = None
+    if _metrics is not None and _metrics.profiling:
+        # cProfile ne suit que le thread appelant : exports ecrits ici, l'un apres l'autre
+        for job in jobs:
+            try:
+                results[job] = run(job)
+            except BaseException as e:
+                error = e
+                break
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {job: executor.submit(run, job) for job in jobs}
+            for job, future in futures.items():
+                try:
+                    results[job] = future.result()
+                except BaseException as e:
+                    if error is None:
+                        error = e
+    if error is not None:
+        for job in results:
+            try:
+                os.remove(paths[job][0])
+            except OSError:
+                pass
+        raise error
+
+    outputs = {}
+    for job in ("txt", "nesting", "materials", "edgebands"):
+        if job not in results:
+            continue
+        output_path, filename = paths[job]
+        counts = results[job]
+        outputs[job] = {"path": output_path, "rows": sum(counts)}
+        if job == "txt":
+            _log_optiplanning_summary(materials_txt, filename, counts[0], log_func)
+        elif job == "nesting":
+            _log_nesting_summary(materials_all, filename, counts[0], log_func)
+        elif job == "materials":
+            outputs[job]["materials"], outputs[job]["edgebands"] = counts
+            log_func(f"Fichier cree : {filename}")
+            log_func(f"  Total : {counts[0]} materiaux + {counts[1]} chants")
+        else:
+            log_func(f"Fichier cree : {filename}")
+            log_func(f"  {counts[0]} chants")
+
+    return {"source": os.path.abspath(xlsm_path), "outputs": outputs}
 
 
 # ---------------------------------------------------------------------------
 # Interface graphique
 # ---------------------------------------------------------------------------
 
+def _load_gui_modules():
+    """Importe Tkinter a la demande (seulement pour l'interface graphique)."""
+    global tk, filedialog, messagebox, ttk
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+
+
 class App:
     """Interface graphique - Theme Destribois 2024"""
 
@@ -885,10 +3169,14 @@ class App:
     FONT_SMALL = ('Roboto', 10)
     FONT_MONO = ('Consolas', 10)
 
+    # Intervalle de lecture de la file du thread d'export (ms)
+    POLL_MS = 50
+
     def __init__(self):
+        _load_gui_modules()
         self.root = tk.Tk()
         self.root.title(f"Export Optiplanning & SWOOD v{APP_VERSION} - Destribois")
-        self.root.geometry("720x660")
+        self.root.geometry("720x770")
         self.root.resizable(True, True)
         self.root.configure(bg=self.BG)
 
@@ -909,6 +3197,8 @@ class App:
             logo_candidates.insert(0, os.path.join(sys._MEIPASS, "Logo_Destribois_seul.png"))
         for logo_path in logo_candidates:
             try:
+                # PIL est optionnel : sans lui, l'en-tete s'affiche sans logo
+                from PIL import Image, ImageTk
                 pil_img = Image.open(logo_path)
                 target_h = 44
                 ratio = target_h / pil_img.height
@@ -1031,6 +3321,59 @@ class App:
             "Chants pour SWOOD - Page EdgeBands",
             '#8A7652', '#A08B66', self.do_export_edgebands)
 
+        # Bouton 5 : les 4 exports en une seule lecture du XLSM
+        self.btn_all = self._create_btn(
+            export_card, "Export complet (4 fichiers)",
+            "TXT + Nesting + Materiaux + Chants - lecture unique",
+            self.TEXT_LIGHT, self.TEXT_MUTED, self.do_export_all)
+
+        # Mode delta : uniquement les lignes modifiees depuis le dernier export
+        self.delta_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(export_card, variable=self.delta_var,
+                       text="Delta : uniquement les lignes nouvelles ou modifiees "
+                            "(sauf export complet)",
+                       font=self.FONT_SMALL, bg=self.BG_ALT, fg=self.TEXT,
+                       activebackground=self.BG_ALT, selectcolor=self.BG,
+                       anchor="w").pack(fill="x", pady=(6, 0))
+
+        # Validation bloquante : aucun fichier ecrit si une ligne est en erreur
+        self.block_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(export_card, variable=self.block_var,
+                       text="Bloquer l'export si la validation trouve des erreurs",
+                       font=self.FONT_SMALL, bg=self.BG_ALT, fg=self.TEXT,
+                       activebackground=self.BG_ALT, selectcolor=self.BG,
+                       anchor="w").pack(fill="x")
+
+        # Cache disque : un classeur inchange n'est pas relu (optionnel)
+        self.cache_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(export_card, variable=self.cache_var,
+                       text="Cache : ne pas relire un classeur inchange",
+                       font=self.FONT_SMALL, bg=self.BG_ALT, fg=self.TEXT,
+                       activebackground=self.BG_ALT, selectcolor=self.BG,
+                       anchor="w").pack(fill="x")
+
+        # Progression de l'export en cours + bouton Annuler
+        progress_frame = tk.Frame(export_card, bg=self.BG_ALT)
+        progress_frame.pack(fill="x", pady=(8, 0))
+
+        style = ttk.Style(self.root)
+        style.configure("Destribois.Horizontal.TProgressbar",
+                        troughcolor=self.BG_DARK, background=self.ACCENT,
+                        bordercolor=self.BORDER, lightcolor=self.ACCENT,
+                        darkcolor=self.ACCENT)
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var,
+                                            maximum=100, mode="determinate",
+                                            style="Destribois.Horizontal.TProgressbar")
+        self.progress_bar.pack(side="left", fill="x", expand=True)
+
+        self.btn_cancel = tk.Button(progress_frame, text="Annuler",
+                                    command=self.cancel_export,
+                                    font=self.FONT_SMALL, bg=self.BG_DARK, fg=self.TEXT,
+                                    activebackground=self.BORDER, state="disabled",
+                                    bd=0, padx=12, pady=4, cursor="hand2", relief="flat")
+        self.btn_cancel.pack(side="right", padx=(8, 0))
+
         # --- Card : Journal ---
         log_card = tk.Frame(main_frame, bg=self.BG_ALT, padx=16, pady=12,
                             highlightbackground=self.BORDER, highlightthickness=1)
@@ -1064,7 +3407,14 @@ class App:
         # --- Init ---
         self._find_default_xlsm()
         self._all_buttons = [self.btn_txt, self.btn_nesting,
-                             self.btn_materials, self.btn_edgebands]
+                             self.btn_materials, self.btn_edgebands, self.btn_all]
+
+        # Export en tache de fond : le thread ne touche jamais a Tk, il
+        # envoie journal, progression et resultat par cette file.
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._worker = None
+        self._last_pct = -1
 
         self.log("Pret. Selectionnez un fichier XLSM et choisissez un export.")
 
@@ -1163,7 +3513,9 @@ class App:
             btn.config(state="normal")
 
     def _run_export(self, export_func, export_name):
-        """Wrapper generique pour tous les exports."""
+        """Wrapper generique pour tous les exports (execute dans un thread)."""
+        if self._worker is not None:
+            return
         xlsm = self._get_xlsm_path()
         if not xlsm:
             return
@@ -1181,30 +3533,119 @@ class App:
             self.log(f"Destination : {os.path.dirname(os.path.abspath(xlsm))}")
         self.log("")
 
+        self._cancel_event.clear()
+        self._last_pct = -1
+        self.progress_var.set(0)
+        self.btn_cancel.config(state="normal")
+        options = {}
+        if self.delta_var.get() and export_func is not export_all:
+            options["delta"] = True
+        configure_validation("block" if self.block_var.get() else "report")
+        if self.cache_var.get() != (_workbook_cache is not None):
+            configure_cache(enabled=self.cache_var.get())
+        self._worker = threading.Thread(target=self._export_worker,
+                                        args=(export_func, xlsm, output_dir, options),
+                                        daemon=True)
+        self._worker.start()
+        self.root.after(self.POLL_MS, self._poll_worker)
+
+    def _export_worker(self, export_func, xlsm, output_dir, options):
+        """Corps du thread d'export : ne communique que par self._queue.
+
+        Le resume des mesures (temps par phase, compteurs) termine le journal.
+        """
         try:
-            result = export_func(xlsm, output_dir=output_dir, log_func=self.log)
-            if result:
-                self.log("")
-                self.log(f"Export termine avec succes !")
-                self.log(f"Fichier : {result}")
-                self._set_status(
-                    f"Export reussi : {os.path.basename(result)}",
-                    self.ACCENT)
-            else:
-                self.log("ERREUR : L'export a echoue.")
-                self._set_status("Echec de l'export. Voir le journal.", self.DANGER)
+            with measure_export(self._queue_log):
+                result = export_func(xlsm, output_dir=output_dir,
+                                     log_func=self._queue_log,
+                                     progress_func=self._queue_progress, **options)
+            self._queue.put(("done", result))
+        except ExportCancelled:
+            self._queue.put(("cancelled", None))
         except PermissionError:
+            self._queue.put(("locked", None))
+        except Exception as e:
+            import traceback
+            self._queue.put(("error", (e, traceback.format_exc())))
+
+    def _queue_log(self, msg):
+        self._queue.put(("log", msg))
+
+    def _queue_progress(self, done, total):
+        """Appele depuis le thread a chaque ligne : annulation + progression (par %)."""
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
+        if total <= 0:
+            return
+        pct = min(100, done * 100 // total)
+        if pct != self._last_pct:
+            self._last_pct = pct
+            self._queue.put(("progress", pct))
+
+    def _poll_worker(self):
+        """Vide la file du thread d'export (boucle Tk via root.after)."""
+        try:
+            while True:
+                kind, payload = self._queue.get_nowait()
+                if kind == "log":
+                    self.log(payload)
+                elif kind == "progress":
+                    self.progress_var.set(payload)
+                else:
+                    self._finish_export(kind, payload)
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_MS, self._poll_worker)
+
+    def _finish_export(self, kind, payload):
+        """Affiche le resultat de l'export et reactive l'interface."""
+        if kind == "done" and isinstance(payload, dict) and payload.get("outputs"):
+            # Manifeste de export_all
+            self.progress_var.set(100)
+            self.log("")
+            self.log(f"Export termine avec succes !")
+            for entry in payload["outputs"].values():
+                self.log(f"Fichier : {entry['path']} ({entry['rows']} lignes)")
+            self._set_status(
+                f"Export reussi : {len(payload['outputs'])} fichiers",
+                self.ACCENT)
+        elif kind == "done" and payload and not isinstance(payload, dict):
+            self.progress_var.set(100)
+            self.log("")
+            self.log(f"Export termine avec succes !")
+            self.log(f"Fichier : {payload}")
+            self._set_status(
+                f"Export reussi : {os.path.basename(payload)}",
+                self.ACCENT)
+        elif kind == "done":
+            self.log("ERREUR : L'export a echoue.")
+            self._set_status("Echec de l'export. Voir le journal.", self.DANGER)
+        elif kind == "cancelled":
+            self.progress_var.set(0)
+            self.log("Export annule. Aucun fichier ecrit.")
+            self._set_status("Export annule.", self.SECONDARY)
+        elif kind == "locked":
             self.log("ERREUR : Fichier verrouille. Fermez Excel et reessayez.")
             self._set_status(
                 "Erreur : fichier verrouille. Fermez Excel et reessayez.",
                 self.DANGER)
-        except Exception as e:
+        else:
+            e, tb = payload
             self.log(f"ERREUR : {e}")
-            import traceback
-            self.log(traceback.format_exc())
+            self.log(tb)
             self._set_status(f"Erreur : {e}", self.DANGER)
-        finally:
-            self._enable_buttons()
+        self._worker = None
+        self.btn_cancel.config(state="disabled")
+        self._enable_buttons()
+
+    def cancel_export(self):
+        """Demande l'arret de l'export en cours (pris en compte entre deux lignes)."""
+        if self._worker is not None and not self._cancel_event.is_set():
+            self._cancel_event.set()
+            self.btn_cancel.config(state="disabled")
+            self.log("Annulation demandee...")
+            self._set_status("Annulation en cours...", self.SECONDARY)
 
     def do_export_txt(self):
         self._run_export(export_optiplanning_txt, "Export TXT Optiplanning")
@@ -1218,38 +3659,720 @@ class App:
     def do_export_edgebands(self):
         self._run_export(export_xml_edgebands, "Export XML Chants (EdgeBands)")
 
+    def do_export_all(self):
+        self._run_export(export_all, "Export complet (4 fichiers)")
+
     def run(self):
         self.root.mainloop()
 
 
+# ---------------------------------------------------------------------------
+# Traitement par lot (plusieurs classeurs)
+# ---------------------------------------------------------------------------
+
+EXPORT_TYPES = ("txt", "nesting", "materials", "edgebands", "all")
+
+
+def run_export(xlsm_path: str, export_type: str, log_func=print, delta: bool = False,
+               stable_uuid: bool = True, snapshot: Optional[WorkbookSnapshot] = None,
+               output_dir: str = None):
+    """Lance un export par son type (EXPORT_TYPES).
+
+    Retourne le chemin du fichier cree, la liste "outputs" du manifeste pour
+    le type all, ou une valeur vide en cas d'echec.
+    """
+    common = {"output_dir": output_dir, "log_func": log_func, "snapshot": snapshot}
+    if export_type == "txt":
+        return export_optiplanning_txt(xlsm_path, delta=delta, **common)
+    if export_type == "nesting":
+        return export_xml_boards_nesting(xlsm_path, delta=delta, stable_uuid=stable_uuid,
+                                         **common)
+    if export_type == "materials":
+        return export_xml_materials(xlsm_path, delta=delta, **common)
+    if export_type == "edgebands":
+        return export_xml_edgebands(xlsm_path, delta=delta, **common)
+    if export_type == "all":
+        return export_all(xlsm_path, stable_uuid=stable_uuid, **common).get("outputs")
+    raise ValueError(f"Type d'export inconnu : {export_type}")
+
+
+def expand_xlsm_inputs(paths) -> List[str]:
+    """Fichiers, dossiers (leurs *.xlsm) et motifs glob -> liste de XLSM sans doublon.
+
+    Les fichiers verrous d'Excel (~$...) sont ignores. Un chemin sans
+    correspondance est garde tel quel (signale introuvable au traitement).
+    """
+    import glob
+
+    found = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(os.path.join(glob.escape(path), "*.xlsm")))
+        elif any(c in path for c in "*?["):
+            matches = sorted(glob.glob(path))
+        else:
+            matches = [path]
+        for match in matches:
+            if os.path.basename(match).startswith("~$"):
+                continue
+            key = os.path.normcase(os.path.abspath(match))
+            if key not in seen:
+                seen.add(key)
+                found.append(match)
+    return found
+
+
+def _batch_tags(xlsm_paths: List[str]) -> List[str]:
+    """Nom de chaque classeur du lot pour les fichiers de sortie (unique dans le lot)."""
+    tags, seen = [], set()
+    for path in xlsm_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        tag, n = stem, 1
+        while os.path.normcase(tag) in seen:
+            n += 1
+            tag = f"{stem}_{n}"
+        seen.add(os.path.normcase(tag))
+        tags.append(tag)
+    return tags
+
+
+def _batch_worker(xlsm_path: str, export_type: str, options: dict, tag: str) -> dict:
+    """Export d'un classeur dans un processus du lot ; le journal est renvoye, pas affiche.
+
+    Les fichiers de sortie portent `tag` dans leur nom et ne remplacent jamais
+    un fichier existant, deja ecrit par un autre classeur du lot.
+    """
+    if options.get("cache", False):
+        configure_cache(enabled=True)
+    configure_reader(direct=options.get("direct_reader", True),
+                     fast_scan=options.get("fast_scan", False))
+    if options.get("numpy", False):
+        configure_numeric(use_numpy=True)
+    configure_validation(options.get("validation", "report"), options.get("validation_report"))
+    logs = []
+    start = time.perf_counter()
+    result, error, metrics = None, "", None
+    configure_output(tag=tag, no_clobber=True)
+    try:
+        if not os.path.exists(xlsm_path):
+            error = "fichier introuvable"
+        else:
+            with measure_export(logs.append) as metrics:
+                result = run_export(xlsm_path, export_type, log_func=logs.append,
+                                    delta=options.get("delta", False),
+                                    stable_uuid=options.get("stable_uuid", True),
+                                    output_dir=options.get("output_dir"))
+            if not result:
+                error = "aucun fichier genere"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        configure_output()
+    if isinstance(result, dict):
+        outputs = [info["path"] for info in result.values()]
+    else:
+        outputs = [result] if result else []
+    return {"source": xlsm_path, "ok": not error, "outputs": outputs, "error": error,
+            "seconds": time.perf_counter() - start, "log": logs,
+            "metrics": metrics.to_dict() if metrics is not None else None}
+
+
+def _log_batch_result(result: dict, log_func=print):
+    name = os.path.basename(result["source"])
+    if result["ok"]:
+        files = ", ".join(os.path.basename(p) for p in result["outputs"])
+        log_func(f"[OK] {name} ({result['seconds']:.1f} s) : {files}")
+    else:
+        log_func(f"[ECHEC] {name} : {result['error']}")
+        for line in result["log"]:
+            log_func(f"    {line}")
+
+
+def export_batch(xlsm_paths: List[str], export_type: str = "txt", max_workers: Optional[int] = None,
+                 log_func=print, delta: bool = False, stable_uuid: bool = True,
+                 use_cache: bool = False, output_dir: str = None,
+                 direct_reader: bool = True, validation: str = "report",
+                 validation_report: Optional[str] = None,
+                 use_numpy: bool = False, fast_scan: bool = False) -> List[dict]:
+    """Exporte plusieurs classeurs en parallele (un processus par classeur).
+
+    La lecture openpyxl est limitee par le GIL : les classeurs sont repartis
+    sur un ProcessPoolExecutor de max_workers processus (defaut : nombre de
+    coeurs). Chaque resultat est journalise des qu'il est termine ; la liste
+    retournee suit l'ordre de xlsm_paths :
+        [{"source", "ok", "outputs", "error", "seconds", "log", "metrics"}, ...]
+    "metrics" est le resume ExportMetrics.to_dict() de l'export du classeur.
+    Les fichiers de sortie portent le nom du classeur (suffixe _2, _3... si
+    deux classeurs du lot ont le meme nom) : {prefix}_{classeur}_{horodatage}.
+    """
+    options = {"delta": delta, "stable_uuid": stable_uuid, "cache": use_cache,
+               "output_dir": output_dir, "direct_reader": direct_reader,
+               "validation": validation, "validation_report": validation_report,
+               "numpy": use_numpy, "fast_scan": fast_scan}
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(xlsm_paths)))
+    tags = _batch_tags(xlsm_paths)
+    results = {}
+    if workers == 1:
+        for path, tag in zip(xlsm_paths, tags):
+            results[path] = _batch_worker(path, export_type, options, tag)
+            _log_batch_result(results[path], log_func)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_batch_worker, path, export_type, options, tag): path
+                       for path, tag in zip(xlsm_paths, tags)}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    # Processus du lot interrompu (memoire, arret brutal...)
+                    results[path] = {"source": path, "ok": False, "outputs": [],
+                                     "error": f"{type(e).__name__}: {e}", "seconds": 0.0,
+                                     "log": [], "metrics": None}
+                _log_batch_result(results[path], log_func)
+    return [results[path] for path in xlsm_paths]
+
+
+def _log_batch_summary(results: List[dict], elapsed: float, workers: int, log_func=print):
+    ok = sum(1 for r in results if r["ok"])
+    failed = len(results) - ok
+    files = sum(len(r["outputs"]) for r in results)
+    busy = sum(r["seconds"] for r in results)
+    log_func("")
+    log_func(f"Lot : {len(results)} classeur(s), {ok} OK, {failed} en echec, "
+             f"{files} fichier(s) genere(s)")
+    log_func(f"  Duree : {elapsed:.1f} s ({busy:.1f} s cumulees, {workers} processus, "
+             f"{len(results) / elapsed if elapsed else 0.0:.2f} classeur(s)/s)")
+    for r in results:
+        if not r["ok"]:
+            log_func(f"  ECHEC : {r['source']} ({r['error']})")
+
+
+# ---------------------------------------------------------------------------
+# Fusion de catalogues multi-fournisseurs
+# ---------------------------------------------------------------------------
+
+MERGE_RULES = ("cheapest", "newest", "priority")
+MERGED_WORKBOOK_NAME = "Catalogue_fusionne.xlsm"
+
+# Colonnes (base 0) utilisees par la fusion : Name, reference fournisseur, cout
+_MERGE_COLUMNS = {"Materials": (0, 45, 5), "EdgeBands": (0, 5, 4)}
+
+
+@dataclass
+class MergeConflict:
+    """Doublon resolu par la fusion : ligne gardee et lignes ecartees ("classeur:ligne")."""
+    sheet: str
+    key: str
+    kept: str
+    rejected: List[str] = field(default_factory=list)
+
+
+def _merge_cost(value) -> float:
+    """Cout comparable ; une valeur vide ou non numerique perd toujours (regle cheapest)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def _sheet_layout(sheet: SheetData) -> tuple:
+    """Tags (row 3) et headers (row 4) sans les colonnes vides de fin."""
+    def trimmed(values):
+        values = list(values)
+        while values and not values[-1]:
+            values.pop()
+        return tuple(values)
+    return trimmed(sheet.tags), trimmed(sheet.headers)
+
+
+def merge_workbooks(xlsm_paths: List[str], rule: str = "cheapest", by_ref: bool = False,
+                    priority: Optional[List[str]] = None, log_func=print):
+    """Fusionne les pages Materials et EdgeBands de plusieurs classeurs.
+
+    Chaque page est indexee par Name (ou Name + reference fournisseur si
+    by_ref). En cas de doublon, la ligne gardee depend de la regle :
+      - cheapest : cout le plus bas (cout vide ou invalide en dernier)
+      - newest   : classeur modifie le plus recemment
+      - priority : ordre de la liste priority (noms ou chemins des classeurs ;
+                   classeurs absents de la liste apres les autres)
+    A egalite, le premier classeur (puis la premiere ligne) l'emporte.
+    La ligne gardee prend la place de la premiere occurrence.
+
+    Les valeurs calculees (data_only) sont lues. Retourne (snapshot, conflits) :
+    un WorkbookSnapshot data_only du catalogue fusionne (lignes 1 a 4 du
+    premier classeur), utilisable par tous les exports, et la liste des
+    MergeConflict. Leve ValueError si une page n'a pas la structure (tags /
+    headers) du premier classeur.
+    """
+    if rule not in MERGE_RULES:
+        raise ValueError(f"Regle de fusion inconnue : {rule} ({', '.join(MERGE_RULES)})")
+    priority_rank = {}
+    for rank, item in enumerate(priority or []):
+        priority_rank.setdefault(os.path.normcase(os.path.basename(item)), rank)
+
+    sources = []
+    for path in xlsm_paths:
+        snapshot = load_snapshot(path, data_only=True, log_func=log_func)
+        if rule == "newest":
+            base_score = -os.path.getmtime(path)
+        elif rule == "priority":
+            base_score = priority_rank.get(os.path.normcase(os.path.basename(path)),
+                                           len(priority_rank))
+        else:
+            base_score = 0
+        sources.append((path, snapshot, base_score))
+
+    merged_rows = {}
+    conflicts = []
+    for sheet_name, (name_col, ref_col, cost_col) in _MERGE_COLUMNS.items():
+        reference = None
+        index = {}  # cle -> [score, valeurs, "classeur:ligne"]
+        sheet_conflicts = {}
+        read = 0
+        for order, (path, snapshot, base_score) in enumerate(sources):
+            if not snapshot.has_sheet(sheet_name):
+                continue
+            ws = snapshot.sheet(sheet_name)
+            if reference is None:
+                reference = ws
+            elif _sheet_layout(ws) != _sheet_layout(reference):
+                raise ValueError(f"Page '{sheet_name}' de {os.path.basename(path)} : "
+                                 f"structure (tags / headers) differente de "
+                                 f"{os.path.basename(sources[0][0])}")
+            width = max(ref_col, cost_col) + 1
+            for row, values in ws.data_rows(width):
+                name = values[name_col]
+                if not name or str(name).strip() == "":
+                    continue
+                read += 1
+                key = str(name).strip()
+                if by_ref:
+                    key += " | " + _safe_str(values[ref_col])
+                if rule == "cheapest":
+                    score = (_merge_cost(values[cost_col]), order, row)
+                else:
+                    score = (base_score, order, row)
+                label = f"{os.path.basename(path)}:{row}"
+                entry = index.get(key)
+                if entry is None:
+                    index[key] = [score, values, label]
+                    continue
+                conflict = sheet_conflicts.get(key)
+                if conflict is None:
+                    conflict = sheet_conflicts[key] = MergeConflict(sheet_name, key, entry[2])
+                if score < entry[0]:
+                    conflict.rejected.append(entry[2])
+                    index[key] = [score, values, label]
+                    conflict.kept = label
+                else:
+                    conflict.rejected.append(label)
+        if reference is None:
+            continue
+        merged_rows[sheet_name] = reference.rows[:4] + [values for _, values, _ in index.values()]
+        conflicts.extend(sheet_conflicts.values())
+        log_func(f"Fusion {sheet_name} : {read} lignes lues, {len(index)} gardees, "
+                 f"{len(sheet_conflicts)} doublon(s) resolu(s)")
+
+    merged_path = os.path.join(os.path.dirname(os.path.abspath(xlsm_paths[0])),
+                               MERGED_WORKBOOK_NAME)
+    return WorkbookSnapshot.from_rows(merged_path, True, merged_rows), conflicts
+
+
+def export_merged(xlsm_paths: List[str], export_type: str = "all", output_dir: str = None,
+                  log_func=print, rule: str = "cheapest", by_ref: bool = False,
+                  priority: Optional[List[str]] = None, delta: bool = False,
+                  stable_uuid: bool = True):
+    """Export unique (TXT / Nesting / SWOOD) du catalogue fusionne de plusieurs classeurs.
+
+    Voir merge_workbooks pour les regles. Les fichiers sont crees dans
+    output_dir (defaut : dossier du premier classeur) ; les doublons resolus
+    sont listes dans Fusion_doublons_<horodatage>.txt.
+    Retourne comme run_export, valeur vide en cas d'echec.
+    """
+    log_func(f"Fusion de {len(xlsm_paths)} classeur(s) (regle {rule}, cle "
+             f"{'Name + ref fournisseur' if by_ref else 'Name'})")
+    try:
+        snapshot, conflicts = merge_workbooks(xlsm_paths, rule, by_ref, priority, log_func)
+    except ValueError as e:
+        log_func(f"ERREUR : {e}")
+        return ""
+    if output_dir is None:
+        output_dir = os.path.dirname(snapshot.xlsm_path)
+
+    result = run_export(snapshot.xlsm_path, export_type, log_func=log_func, delta=delta,
+                        stable_uuid=stable_uuid, snapshot=snapshot, output_dir=output_dir)
+    if result and conflicts:
+        report_path, report_name = _output_path(snapshot.xlsm_path, output_dir,
+                                                "Fusion_doublons", "txt")
+        with _open_output(report_path) as f:
+            for c in conflicts:
+                f.write(f"{c.sheet}\t{c.key}\tgarde : {c.kept}\t"
+                        f"ecarte(s) : {', '.join(c.rejected)}\n")
+        log_func(f"Doublons resolus : {report_name}")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Surveillance : re-export automatique quand un XLSM est enregistre
+# ---------------------------------------------------------------------------
+
+def sheet_fingerprints(xlsm_path: str) -> dict:
+    """Empreinte de chaque page : CRC (stockes dans le zip, rien n'est decompresse)
+    du XML de la page, des sharedStrings et des styles.
+
+    Retourne {} si le fichier n'est pas un classeur lisible (enregistrement
+    en cours...).
+    """
+    import zipfile
+    import xml.etree.ElementTree as ET
+
+    try:
+        with zipfile.ZipFile(xlsm_path) as zf:
+            crcs = {info.filename: info.CRC for info in zf.infolist()}
+            members = _xlsx_sheet_members(zf)
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        return {}
+    shared = (crcs.get("xl/sharedStrings.xml"), crcs.get("xl/styles.xml"))
+    return {name: (crcs.get(member),) + shared for name, member in members.items()}
+
+
+def refresh_snapshot(xlsm_path: str, previous: Optional[WorkbookSnapshot] = None,
+                     previous_fingerprints: Optional[dict] = None, log_func=print):
+    """Snapshot a jour du classeur, en ne relisant que les pages modifiees.
+
+    Retourne (snapshot, empreintes, pages relues). Sans snapshot precedent,
+    le classeur est charge en entier (load_snapshot, cache disque compris).
+    """
+    fingerprints = sheet_fingerprints(xlsm_path)
+    if previous is None or not fingerprints or not previous_fingerprints:
+        return load_snapshot(xlsm_path, log_func=log_func), fingerprints, list(SNAPSHOT_SHEETS)
+
+    changed = [name for name in SNAPSHOT_SHEETS
+               if fingerprints.get(name) != previous_fingerprints.get(name)]
+    if not changed:
+        return previous, fingerprints, []
+    cache = _workbook_cache
+    try:
+        meta = cache.file_meta(xlsm_path) if cache is not None else None
+    except OSError:
+        meta = None
+    partial = WorkbookSnapshot(xlsm_path, data_only=False, sheet_names=changed)
+    sheets = {name: sheet for name, sheet in previous.sheets.items() if name not in changed}
+    sheets.update(partial.sheets)
+    snapshot = WorkbookSnapshot.from_rows(xlsm_path, False,
+                                          {name: sheets[name].rows for name in SNAPSHOT_SHEETS
+                                           if name in sheets})
+    if meta is not None:
+        try:
+            cache.put(snapshot, meta)
+        except Exception:
+            pass
+    return snapshot, fingerprints, changed
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def watch_workbooks(inputs: List[str], export_type: str = "all", output_dir: str = None,
+                    interval: float = 2.0, debounce: float = 2.0, log_func=print,
+                    stop_event: Optional[threading.Event] = None, delta: bool = False,
+                    stable_uuid: bool = True):
+    """Surveille des XLSM (fichiers, dossiers, motifs glob) et relance l'export a chaque
+    enregistrement.
+
+    Toutes les `interval` secondes, seuls taille et date de modification sont
+    lus (os.stat) : le processus reste au repos entre deux enregistrements.
+    Un changement n'est traite qu'une fois le fichier stable depuis
+    `debounce` secondes et lisible comme un zip complet (pas d'export sur un
+    enregistrement en cours) ; les fichiers verrous ~$ d'Excel sont ignores.
+    Seules les pages modifiees sont relues (refresh_snapshot) ; si aucune page
+    exportee n'a change, l'export n'est pas relance.
+    S'arrete quand stop_event est positionne (ou par Ctrl+C en CLI).
+    """
+    import zipfile
+
+    stop_event = stop_event or threading.Event()
+    state = {}      # chemin -> (signature, snapshot, empreintes)
+    pending = {}    # chemin -> (signature, premiere observation)
+    unread = set()  # classeurs dont la lecture initiale a echoue, relus au prochain controle
+
+    def read_initial(path, signature):
+        try:
+            snapshot, fingerprints, _ = refresh_snapshot(path, log_func=lambda msg: None)
+        except Exception as e:
+            if path not in unread:
+                unread.add(path)
+                log_func(f"ERREUR : {os.path.basename(path)} : {type(e).__name__}: {e} "
+                         f"(nouvelle lecture au prochain controle)")
+            return
+        if path in unread:
+            unread.discard(path)
+            log_func(f"[{datetime.now():%H:%M:%S}] {os.path.basename(path)} lu, surveille")
+        state[path] = (signature, snapshot, fingerprints)
+
+    for path in expand_xlsm_inputs(inputs):
+        signature = _file_signature(path)
+        if signature is None:
+            continue
+        read_initial(path, signature)
+    log_func(f"Surveillance de {len(state) + len(unread)} classeur(s), export {export_type} "
+             f"(controle toutes les {interval:g} s, Ctrl+C pour arreter)")
+
+    while not stop_event.wait(interval):
+        now = time.monotonic()
+        for path in expand_xlsm_inputs(inputs):
+            signature = _file_signature(path)
+            if signature is None:
+                continue
+            if path in unread:
+                read_initial(path, signature)
+                continue
+            known = state.get(path)
+            if known is not None and known[0] == signature:
+                pending.pop(path, None)
+                continue
+            waiting = pending.get(path)
+            if waiting is None or waiting[0] != signature:
+                pending[path] = (signature, now)
+                continue
+            if now - waiting[1] < debounce or not zipfile.is_zipfile(path):
+                continue
+            del pending[path]
+
+            name = os.path.basename(path)
+            log_func("")
+            log_func(f"[{datetime.now():%H:%M:%S}] {name} modifie")
+            try:
+                previous = known[1] if known is not None else None
+                previous_fp = known[2] if known is not None else None
+                snapshot, fingerprints, changed = refresh_snapshot(path, previous, previous_fp,
+                                                                   log_func)
+                state[path] = (signature, snapshot, fingerprints)
+                if not changed:
+                    log_func("  Pages Materials / EdgeBands inchangees : export non relance")
+                    continue
+                log_func(f"  Pages relues : {', '.join(changed)}")
+                result = run_export(path, export_type, log_func=log_func, delta=delta,
+                                    stable_uuid=stable_uuid, snapshot=snapshot,
+                                    output_dir=output_dir)
+                if not result:
+                    log_func(f"ERREUR : export de {name} en echec")
+            except Exception as e:
+                # Le fichier sera retraite au prochain enregistrement
+                state.pop(path, None)
+                log_func(f"ERREUR : {name} : {type(e).__name__}: {e}")
+
+
 # ---------------------------------------------------------------------------
 # Point d'entree
 # ---------------------------------------------------------------------------
 
-if __name__ == "__main__":
-    # Mode ligne de commande si argument
-    if len(sys.argv) > 1:
-        xlsm = sys.argv[1]
+@contextmanager
+def _cli_measure(args):
+    """measure_export si --metrics ou --profile est demande, sinon rien (None)."""
+    if args.metrics is None and args.profile is None:
+        yield None
+        return
+    with measure_export(profile=args.profile is not None,
+                        profile_path=args.profile or None) as metrics:
+        yield metrics
+
+
+def _write_metrics_json(path: str, data: dict):
+    """Ecrit les mesures en JSON (path "-" : sortie standard), de facon atomique."""
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(text)
+    else:
+        with _open_output(path, newline="\n") as f:
+            f.write(text + "\n")
+
+
+def main(argv=None) -> int:
+    """Mode ligne de commande.
+
+    export_optiplanning.py fichier.xlsm [type] [options]
+    export_optiplanning.py a.xlsm b.xlsm dossier/ "sites/*.xlsm" [type] [-j N] [options]
+    Plusieurs classeurs, un dossier ou un motif glob declenchent le
+    traitement par lot (export_batch) ; avec --merge RULE, ils sont fusionnes
+    en un seul export (export_merged) ; avec --watch, ils sont surveilles
+    (watch_workbooks).
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="export_optiplanning",
+        description="Exports Optiplanning / SWOOD depuis le XLSM Destribois.")
+    parser.add_argument("inputs", nargs="+", metavar="xlsm",
+                        help="fichier(s) XLSM, dossier(s) ou motif(s) glob, suivis "
+                             f"eventuellement du type d'export : {', '.join(EXPORT_TYPES)} "
+                             "(defaut : txt)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="dossier des fichiers generes (defaut : dossier du XLSM)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processus paralleles pour un lot (defaut : nombre de coeurs)")
+    parser.add_argument("--watch", action="store_true",
+                        help="surveille les XLSM et relance l'export a chaque enregistrement")
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="surveillance : secondes entre deux controles (defaut : 2)")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="surveillance : secondes de stabilite avant export (defaut : 2)")
+    parser.add_argument("--merge", choices=MERGE_RULES, default=None,
+                        help="fusionne les classeurs en un seul export ; regle de "
+                             "resolution des doublons")
+    parser.add_argument("--merge-by-ref", action="store_true",
+                        help="fusion : doublon = meme Name ET meme reference fournisseur")
+    parser.add_argument("--priority", default="",
+                        help="fusion (regle priority) : classeurs par priorite, "
+                             "separes par des virgules")
+    parser.add_argument("--random-uuid", action="store_true",
+                        help="LibraryUUID aleatoire (uuid4) pour les plaques Nesting "
+                             "au lieu de l'UUID stable")
+    parser.add_argument("--cache", action="store_true",
+                        help="cache disque des classeurs lus : un classeur inchange n'est "
+                             "pas relu")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="relit toujours le XLSM (defaut ; l'emporte sur --cache)")
+    parser.add_argument("--openpyxl", action="store_true",
+                        help="lit les pages avec openpyxl au lieu du lecteur XLSX direct")
+    parser.add_argument("--fast-scan", action="store_true",
+                        help="lecteur direct : balayage rapide du texte des pages "
+                             "(2 a 3x plus rapide qu'iterparse) au lieu d'iterparse")
+    parser.add_argument("--numpy", action="store_true",
+                        help="calculs par colonne (dimensions, couts Nesting) avec NumPy "
+                             "s'il est installe")
+    parser.add_argument("--validation", choices=VALIDATION_MODES, default="report",
+                        help="controle des lignes avant export : report (journal, defaut), "
+                             "block (aucun fichier si erreur) ou off")
+    parser.add_argument("--validation-report", metavar="DOSSIER", default=None,
+                        help="ecrit le rapport de validation complet dans ce dossier "
+                             f"(au-dela de {VALIDATION_LOG_LIMIT} problemes)")
+    parser.add_argument("--delta", action="store_true",
+                        help="n'exporte que les lignes nouvelles ou modifiees depuis le "
+                             "dernier export (sauf type all)")
+    parser.add_argument("--metrics", metavar="FICHIER.json", default=None,
+                        help="ecrit les mesures (temps par phase, compteurs) en JSON ; "
+                             "- pour la sortie standard")
+    parser.add_argument("--profile", metavar="FICHIER.prof", nargs="?", const="",
+                        default=None,
+                        help="profile l'export (cProfile + tracemalloc, un seul classeur) ; "
+                             "ecrit le fichier pstats si un chemin est donne")
+    args = parser.parse_args(argv)
+
+    inputs = list(args.inputs)
+    export_type = "txt"
+    if len(inputs) > 1 and not os.path.exists(inputs[-1]):
+        export_type = inputs.pop()
+    if export_type not in EXPORT_TYPES:
+        print(f"Type d'export inconnu : {export_type}")
+        print(f"Types valides : {', '.join(EXPORT_TYPES)}")
+        return 1
+    if args.delta and export_type == "all":
+        print("ERREUR : --delta n'est pas disponible avec le type all")
+        return 1
+
+    if args.output_dir and not os.path.isdir(args.output_dir):
+        print(f"ERREUR : Dossier de sortie introuvable : {args.output_dir}")
+        return 1
+    if args.validation_report and not os.path.isdir(args.validation_report):
+        print(f"ERREUR : Dossier de rapport introuvable : {args.validation_report}")
+        return 1
+    measuring = args.metrics is not None or args.profile is not None
+    configure_reader(direct=not args.openpyxl, fast_scan=args.fast_scan)
+    if args.numpy:
+        configure_numeric(use_numpy=True)
+        if _numpy() is None:
+            print("ATTENTION : NumPy n'est pas installe, calculs en Python pur")
+    configure_validation(args.validation, args.validation_report)
+    use_cache = args.cache and not args.no_cache
+    configure_cache(enabled=use_cache)
+    if args.watch:
+        if args.merge:
+            print("ERREUR : --watch et --merge ne peuvent pas etre combines")
+            return 1
+        if measuring:
+            print("ERREUR : --metrics et --profile ne sont pas disponibles avec --watch")
+            return 1
+        try:
+            watch_workbooks(inputs, export_type, output_dir=args.output_dir,
+                            interval=args.interval, debounce=args.debounce,
+                            delta=args.delta, stable_uuid=not args.random_uuid)
+        except KeyboardInterrupt:
+            print("Surveillance arretee.")
+        return 0
+
+    if args.merge:
+        xlsm_paths = expand_xlsm_inputs(inputs)
+        missing = [p for p in xlsm_paths if not os.path.exists(p)]
+        if missing or not xlsm_paths:
+            print(f"ERREUR : Fichier introuvable : {', '.join(missing) or ' '.join(inputs)}")
+            return 1
+        priority = [p.strip() for p in args.priority.split(",") if p.strip()]
+        with _cli_measure(args) as metrics:
+            result = export_merged(xlsm_paths, export_type, output_dir=args.output_dir,
+                                   rule=args.merge,
+                                   by_ref=args.merge_by_ref, priority=priority,
+                                   delta=args.delta, stable_uuid=not args.random_uuid)
+        if args.metrics is not None:
+            _write_metrics_json(args.metrics, {"sources": xlsm_paths, "export": export_type,
+                                               "ok": bool(result), **metrics.to_dict()})
+        return 0 if result else 1
+
+    batch = len(inputs) > 1 or any(os.path.isdir(p) or any(c in p for c in "*?[")
+                                   for p in inputs)
+    if not batch:
+        xlsm = inputs[0]
         if not os.path.exists(xlsm):
             print(f"ERREUR : Fichier introuvable : {xlsm}")
-            sys.exit(1)
-
-        export_type = sys.argv[2] if len(sys.argv) > 2 else "txt"
-
-        if export_type == "txt":
-            result = export_optiplanning_txt(xlsm)
-        elif export_type == "nesting":
-            result = export_xml_boards_nesting(xlsm)
-        elif export_type == "materials":
-            result = export_xml_materials(xlsm)
-        elif export_type == "edgebands":
-            result = export_xml_edgebands(xlsm)
-        else:
-            print(f"Type d'export inconnu : {export_type}")
-            print("Types valides : txt, nesting, materials, edgebands")
-            sys.exit(1)
+            return 1
+        with _cli_measure(args) as metrics:
+            result = run_export(xlsm, export_type, delta=args.delta,
+                                stable_uuid=not args.random_uuid, output_dir=args.output_dir)
+        if args.metrics is not None:
+            _write_metrics_json(args.metrics, {"source": xlsm, "export": export_type,
+                                               "ok": bool(result), **metrics.to_dict()})
+        return 0 if result else 1
+
+    xlsm_paths = expand_xlsm_inputs(inputs)
+    if not xlsm_paths:
+        print("ERREUR : Aucun fichier XLSM trouve.")
+        return 1
+    if args.profile is not None:
+        print("ERREUR : --profile ne s'applique qu'a un seul classeur (pas de lot)")
+        return 1
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(xlsm_paths)))
+    print(f"Lot : {len(xlsm_paths)} classeur(s), export {export_type}, {workers} processus")
+    start = time.perf_counter()
+    results = export_batch(xlsm_paths, export_type, max_workers=workers, delta=args.delta,
+                           stable_uuid=not args.random_uuid, use_cache=use_cache,
+                           output_dir=args.output_dir, direct_reader=not args.openpyxl,
+                           validation=args.validation,
+                           validation_report=args.validation_report,
+                           use_numpy=args.numpy, fast_scan=args.fast_scan)
+    elapsed = time.perf_counter() - start
+    _log_batch_summary(results, elapsed, workers)
+    if args.metrics is not None:
+        _write_metrics_json(args.metrics, {
+            "export": export_type, "seconds": round(elapsed, 4), "workers": workers,
+            "workbooks": [{key: r[key] for key in ("source", "ok", "seconds", "metrics")}
+                          for r in results]})
+    return 0 if all(r["ok"] for r in results) else 1
 
-        sys.exit(0 if result else 1)
+
+if __name__ == "__main__":
+    # Mode ligne de commande si argument
+    if len(sys.argv) > 1:
+        # Necessaire aux processus du traitement par lot dans l'executable PyInstaller
+        import multiprocessing
+        multiprocessing.freeze_support()
+        sys.exit(main())
 
     # Mode GUI
     app = App()